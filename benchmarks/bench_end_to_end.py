@@ -0,0 +1,187 @@
+"""
+Benchmark: end-to-end scan throughput against a local fake server farm
+
+Starts benchmarks/fake_server_farm.py in a child process and runs the real
+scan_pipeline() (connect sweep, SLP handshake, sent list, database writes,
+webhooks to a local sink) against it for a fixed time. Target hosts are
+drawn from --target-hosts consecutive loopback addresses, the farm listens
+on the first --hosts of them, so the rest refuse like empty addresses.
+Needs no network; use --fail-below to gate a build on scans/s.
+
+    python benchmarks/bench_end_to_end.py [--seconds 20] [--hosts 256] [--target-hosts 512]
+        [--ports 25565-25568] [--latency exp:0.005] [--drop 0.02] [--blackhole 0.01]
+        [--malformed 0.01] [--concurrency 0] [--fail-below 0]
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # scanner_v2GUI uses paths relative to the repo root
+
+from benchmarks.fake_server_farm import add_farm_arguments, farm_from_args, host_addresses
+from ressources.sockets import raise_fd_limit
+
+
+# ========= FARM PROCESS =========
+async def run_farm(args, conn):
+    from aiohttp import web
+
+    raise_fd_limit()
+    farm = farm_from_args(args)
+    listeners = await farm.start()
+
+    # Webhook sink, so found servers go through the real webhook path
+    webhooks = 0
+
+    async def sink(request):
+        nonlocal webhooks
+        await request.read()
+        webhooks += 1
+        return web.Response(status=204)
+
+    app = web.Application()
+    app.router.add_post("/webhook", sink)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+
+    conn.send((listeners, f"http://127.0.0.1:{port}/webhook"))
+    await asyncio.get_running_loop().run_in_executor(None, conn.recv)  # wait for "stop"
+    conn.send(dict(farm.stats, webhooks=webhooks))
+    await runner.cleanup()
+    await farm.stop()
+
+
+def farm_process(args, conn):
+    asyncio.run(run_farm(args, conn))
+
+
+# ========= SCANNER =========
+def rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+
+def cpu_seconds() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+async def run_scanner(scanner, args, targets_pool):
+    from ressources.concurrency import AdaptiveLimiter
+
+    limiter = None
+    if args.concurrency:
+        limiter = AdaptiveLimiter(args.concurrency, args.concurrency, args.concurrency)
+    deadline_reached = False
+    result = {}
+
+    def targets():
+        rng = random.Random(args.seed)
+        while not deadline_reached:
+            yield rng.choice(targets_pool)
+
+    async def measure():
+        nonlocal deadline_reached
+        start_counts = scanner.counters.snapshot()
+        start_cpu, start = cpu_seconds(), time.perf_counter()
+        await asyncio.sleep(args.seconds)
+        counts = scanner.counters.snapshot()
+        result["elapsed"] = time.perf_counter() - start
+        result["cpu"] = cpu_seconds() - start_cpu
+        result["scanned"] = counts["scanned"] - start_counts["scanned"]
+        result["found"] = counts["found"] - start_counts["found"]
+        result["rss"] = rss_bytes()
+        deadline_reached = True
+
+    await asyncio.gather(measure(), scanner.scan_pipeline(targets(), limiter, args.slp_concurrency))
+    # Let queued webhooks finish before the farm is stopped
+    while scanner.webhooks_pending:
+        await asyncio.sleep(0.05)
+    if scanner.http_session is not None:
+        await scanner.http_session.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    add_farm_arguments(parser)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--target-hosts", type=int, default=512,
+                        help="addresses to scan, the ones beyond --hosts refuse connections")
+    parser.add_argument("--concurrency", type=int, default=0,
+                        help="fixed connect concurrency (0 = the configured adaptive limiter)")
+    parser.add_argument("--slp-concurrency", type=int, default=None)
+    parser.add_argument("--connect-timeout", type=float, default=0.5)
+    parser.add_argument("--first-byte-timeout", type=float, default=0.5)
+    parser.add_argument("--timeout", type=float, default=1.0)
+    parser.add_argument("--fail-below", type=float, default=0.0,
+                        help="exit with status 1 when scans/s is below this value")
+    args = parser.parse_args()
+
+    conn, child_conn = multiprocessing.Pipe()
+    farm = multiprocessing.Process(target=farm_process, args=(args, child_conn), daemon=True)
+    farm.start()
+    listeners, webhook_url = conn.recv()
+    print(f"[BENCH] Farm: {listeners} listeners on {args.hosts} hosts x ports {args.ports}, "
+          f"latency {args.latency}, drop {args.drop:.0%} blackhole {args.blackhole:.0%} "
+          f"malformed {args.malformed:.0%}")
+
+    raise_fd_limit()
+    with tempfile.TemporaryDirectory() as tmp:
+        # Importing scanner_v2GUI opens both files, keep it off the real ones
+        import config.config as config
+        config.DATABASE_FILE = os.path.join(tmp, "servers.db")
+        config.SENT_FILE = os.path.join(tmp, "sent_servers.txt")
+        import scanner_v2GUI as scanner
+
+        scanner.config.WEBHOOK_URL = webhook_url
+        scanner.config.TIMEOUT = args.timeout
+        scanner.CONNECT_TIMEOUT = args.connect_timeout
+        scanner.FIRST_BYTE_TIMEOUT = args.first_byte_timeout
+        scanner.SCAN_PORTS = scanner.parse_ports(args.ports)
+        scanner.port_stats = scanner.ShardedCounters(
+            *((port, key) for port in scanner.SCAN_PORTS for key in scanner.PORT_STAT_KEYS))
+
+        targets_pool = host_addresses(args.target_hosts, args.first_host)
+        result = asyncio.run(run_scanner(scanner, args, targets_pool))
+
+    conn.send("stop")
+    farm_stats = conn.recv()
+    farm.join(5)
+
+    elapsed, scanned = result["elapsed"], result["scanned"]
+    scans_per_second = scanned / elapsed
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    print(f"[BENCH] {elapsed:.1f}s, {scanned:,} probes, {result['found']:,} servers found")
+    print(f"[BENCH] scans/s      {scans_per_second:>12,.0f}")
+    print(f"[BENCH] hits/s       {result['found'] / elapsed:>12,.0f}")
+    print(f"[BENCH] CPU/probe    {result['cpu'] / max(1, scanned) * 1e6:>12,.1f} us  "
+          f"({result['cpu'] / elapsed:.0%} of one core)")
+    print(f"[BENCH] memory       {result['rss'] / 2 ** 20:>12,.1f} MB RSS  "
+          f"(peak {max(usage.ru_maxrss * 1024, result['rss']) / 2 ** 20:,.1f} MB)")
+    for phase, hist in scanner.latency.items():
+        print(f"[BENCH] {phase:<12} {scanner.format_percentiles(hist)}")
+    print(f"[BENCH] ports\n{scanner.format_port_stats()}")
+    print(f"[BENCH] farm {farm_stats}")
+
+    if args.fail_below and scans_per_second < args.fail_below:
+        print(f"[BENCH] FAIL: {scans_per_second:,.0f} scans/s is below {args.fail_below:,.0f}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
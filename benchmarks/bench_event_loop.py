@@ -0,0 +1,81 @@
+"""
+Benchmark: event loop implementations (status probes/sec)
+
+Runs a local Server List Ping responder and the scanner's query_status()
+client in the same loop, once per available loop implementation
+(asyncio, and uvloop when it is installed).
+
+    python benchmarks/bench_event_loop.py [--probes 20000] [--concurrency 200]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ressources.loops import install_event_loop, loop_name, uvloop
+from ressources.packets import encode_varint
+from ressources.slp import query_status
+
+STATUS = json.dumps({
+    "version": {"name": "1.20.4", "protocol": 765},
+    "players": {"max": 20, "online": 3},
+    "description": {"text": "benchmark"},
+}).encode()
+
+
+async def handle(reader, writer):
+    try:
+        await reader.read(1024)
+        payload = encode_varint(0) + encode_varint(len(STATUS)) + STATUS
+        writer.write(encode_varint(len(payload)) + payload)
+        await writer.drain()
+    except Exception:
+        pass
+    finally:
+        writer.close()
+
+
+async def run(probes, concurrency):
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    limit = asyncio.Semaphore(concurrency)
+    answered = 0
+
+    async def probe():
+        nonlocal answered
+        async with limit:
+            if await query_status("127.0.0.1", port, 5.0) is not None:
+                answered += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(probe() for _ in range(probes)))
+    elapsed = time.perf_counter() - start
+    server.close()
+    await server.wait_closed()
+    return loop_name(), answered, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--probes", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    args = parser.parse_args()
+
+    loops = ["asyncio"] + (["uvloop"] if uvloop is not None else [])
+    if uvloop is None:
+        print("[BENCH] uvloop is not installed, only the asyncio loop is measured")
+    for name in loops:
+        install_event_loop(name)
+        active, answered, elapsed = asyncio.run(run(args.probes, args.concurrency))
+        print(f"[BENCH] {active:<10} {answered / elapsed:>10,.0f} probes/s  "
+              f"({answered}/{args.probes} answered, {elapsed:.2f}s)")
+    install_event_loop("asyncio")
+
+
+if __name__ == "__main__":
+    main()
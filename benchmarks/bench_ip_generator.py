@@ -0,0 +1,83 @@
+"""
+Benchmark: random target generation (addresses/sec)
+
+Compares the per-address random_ip() with the BatchIPGenerator used by the
+scan pipeline (NumPy and pure Python paths).
+
+    python benchmarks/bench_ip_generator.py [--count 1000000] [--batch 4096]
+"""
+import argparse
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # scanner_v2GUI uses paths relative to the repo root
+
+# Importing scanner_v2GUI opens the database and the sent list, keep it off the real ones
+import config.config as config
+IMPORT_DIR = tempfile.mkdtemp(prefix="mcs-bench-")
+atexit.register(shutil.rmtree, IMPORT_DIR, ignore_errors=True)
+config.DATABASE_FILE = os.path.join(IMPORT_DIR, "servers.db")
+config.SENT_FILE = os.path.join(IMPORT_DIR, "sent_servers.txt")
+
+import scanner_v2GUI as scanner
+from ressources import targets
+from ressources.targets import BatchIPGenerator
+
+
+def bench(name, produce, count):
+    start = time.perf_counter()
+    produced = produce(count)
+    elapsed = time.perf_counter() - start
+    print(f"[BENCH] {name:<28} {produced / elapsed:>14,.0f} addresses/s  ({elapsed:.2f}s)")
+    return produced / elapsed
+
+
+def run_random_ip(count):
+    random_ip = scanner.random_ip
+    for _ in range(count):
+        random_ip()
+    return count
+
+
+def run_batch(generator, batch_size, use_numpy):
+    def produce(count):
+        produced = 0
+        next_batch = generator._batch_numpy if use_numpy else generator._batch_python
+        while produced < count:
+            produced += len(next_batch(min(batch_size, count - produced)))
+        return produced
+    return produce
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark random target generation")
+    parser.add_argument("--count", type=int, default=1_000_000, help="addresses per benchmark")
+    parser.add_argument("--batch", type=int, default=4096, help="batch size for BatchIPGenerator")
+    args = parser.parse_args()
+
+    baseline = bench("random_ip()", run_random_ip, args.count)
+
+    if targets.np is not None:
+        generator = BatchIPGenerator(scanner.ASN_RANGES, scanner.ASN_PROB, scanner.ASN_EXPAND_BITS)
+        rate = bench("BatchIPGenerator (numpy)", run_batch(generator, args.batch, True), args.count)
+        print(f"[BENCH] numpy speedup: {rate / baseline:.1f}x")
+    else:
+        print("[BENCH] numpy not installed, skipping vectorized path")
+
+    saved_np, targets.np = targets.np, None
+    try:
+        generator = BatchIPGenerator(scanner.ASN_RANGES, scanner.ASN_PROB, scanner.ASN_EXPAND_BITS)
+        rate = bench("BatchIPGenerator (python)", run_batch(generator, args.batch, False), args.count)
+        print(f"[BENCH] python fallback speedup: {rate / baseline:.1f}x")
+    finally:
+        targets.np = saved_np
+
+
+if __name__ == "__main__":
+    main()
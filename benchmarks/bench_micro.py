@@ -0,0 +1,286 @@
+"""
+Micro-benchmarks for the per-probe and per-keystroke helpers
+
+Times every benchmark with timeit (best of several repeats) and compares
+the result with a saved baseline. Baselines depend on the machine, so they
+are kept out of git; record one on the machine you compare on:
+
+    python benchmarks/bench_micro.py --save              # record the baseline
+    python benchmarks/bench_micro.py                     # compare against it
+    python benchmarks/bench_micro.py --filter varint --max-regression 10
+    python benchmarks/bench_micro.py --db-rows 10000,100000
+
+The database benchmarks run on temporary databases with --db-rows rows
+(default 10k, 100k and 1M; building the 1M database takes a while).
+"""
+import argparse
+import asyncio
+import atexit
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)  # scanner_v2GUI uses paths relative to the repo root
+
+# Importing scanner_v2GUI opens the database and the sent list, keep it off the real ones
+import config.config as config
+IMPORT_DIR = tempfile.mkdtemp(prefix="mcs-bench-")
+atexit.register(shutil.rmtree, IMPORT_DIR, ignore_errors=True)
+config.DATABASE_FILE = os.path.join(IMPORT_DIR, "servers.db")
+config.SENT_FILE = os.path.join(IMPORT_DIR, "sent_servers.txt")
+
+import scanner_v2GUI as scanner
+from ressources.packets import encode_varint
+from ressources.slp import decode_varint, status_text
+
+BASELINE_FILE = os.path.join(ROOT, "benchmarks", "micro_baseline.json")
+
+BENCHMARKS = []  # (name, setup, repeat); setup(tmp) returns the callable to time
+
+
+def benchmark(name: str, repeat: int = 5):
+    def register(setup):
+        BENCHMARKS.append((name, setup, repeat))
+        return setup
+    return register
+
+
+# ========= PACKETS =========
+VARINT_VALUES = (0, 1, 127, 128, 300, 25565, 2 ** 21, 2 ** 31 - 1)
+
+
+@benchmark("encode_varint (8 values)")
+def bench_encode_varint(tmp):
+    values = VARINT_VALUES
+
+    def run():
+        for value in values:
+            encode_varint(value)
+    return run
+
+
+@benchmark("decode_varint (8 values)")
+def bench_decode_varint(tmp):
+    encoded = [encode_varint(value) for value in VARINT_VALUES]
+
+    def run():
+        for buf in encoded:
+            decode_varint(buf)
+    return run
+
+
+def status_payload(favicon_bytes: int) -> bytes:
+    status = {
+        "version": {"name": "Paper 1.20.4", "protocol": 765},
+        "players": {"max": 100, "online": 7, "sample": [
+            {"name": f"player{i}", "id": "4566e69f-c907-48ee-8d71-d7ba5aa00d20"} for i in range(7)]},
+        "description": {"text": "A Minecraft Server", "extra": [{"text": " - survival", "color": "gold"}]},
+        "enforcesSecureChat": True,
+    }
+    if favicon_bytes:
+        status["favicon"] = "data:image/png;base64," + "A" * favicon_bytes
+    body = json.dumps(status).encode()
+    return encode_varint(0) + encode_varint(len(body)) + body
+
+
+@benchmark("status_parse (no favicon)")
+def bench_status_parse(tmp):
+    payload = status_payload(0)
+    return lambda: json.loads(status_text(payload))
+
+
+@benchmark("status_parse (16 KB favicon)")
+def bench_status_parse_favicon(tmp):
+    payload = status_payload(16 * 1024)
+    return lambda: json.loads(status_text(payload))
+
+
+# ========= TARGETS =========
+@benchmark("random_ip")
+def bench_random_ip(tmp):
+    return scanner.random_ip
+
+
+@benchmark("random_from_cidr")
+def bench_random_from_cidr(tmp):
+    base, mask = scanner.ASN_RANGES[0]
+    return lambda: scanner.random_from_cidr(base, mask, scanner.ASN_EXPAND_BITS)
+
+
+@benchmark("ip_to_int + int_to_ip")
+def bench_ip_roundtrip(tmp):
+    return lambda: scanner.int_to_ip(scanner.ip_to_int("203.0.113.57"))
+
+
+# ========= DATABASE =========
+def fill_database(path: str, rows: int):
+    """Synthetic servers table with `rows` rows (kept for the other benchmarks of the same size)"""
+    scanner.DATABASE_FILE = path
+    if os.path.exists(path):
+        return
+    scanner.init_db()
+    rng = random.Random(rows)
+    now = time.time()
+    conn = sqlite3.connect(path)
+    conn.executemany(
+        "INSERT OR IGNORE INTO servers (ip, port, motd, version, players_online, players_max, host, bild, scanned_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, '', '', datetime(?, 'unixepoch'))",
+        ((scanner.int_to_ip(0x0B000000 + i), 25565, f"A Minecraft Server #{i}", "1.20.4",
+          rng.randint(0, 50), 100, now - rng.randint(0, 86400 * 30)) for i in range(rows)))
+    conn.commit()
+    conn.close()
+
+
+@benchmark("update_server", repeat=3)
+def bench_update_server(tmp):
+    path = os.path.join(tmp, "update.db")
+    fill_database(path, 10000)
+    rng = random.Random(1)
+
+    def run():
+        scanner.DATABASE_FILE = path
+        scanner.update_server(scanner.int_to_ip(0x0B000000 + rng.randrange(20000)), 25565,
+                              "motd", "1.20.4", 3, 20)
+    return run
+
+
+def list_key(path: str, position: int):
+    """(scanned_at, id) key of the row at `position` of the newest-first server list"""
+    conn = sqlite3.connect(path)
+    key = conn.execute("SELECT scanned_at, id FROM servers ORDER BY scanned_at DESC, id DESC "
+                       "LIMIT 1 OFFSET ?", (position,)).fetchone()
+    conn.close()
+    return key
+
+
+SERVER_LIST_QUERIES = ("server list open", "server list scroll", "server list jump", "server list search")
+
+
+def server_list_queries(path: str, rows: int) -> dict:
+    """The queries the virtual server lists run: open, scroll a page, drag the scrollbar, search"""
+    page = scanner.SERVER_LIST_PAGE
+    key = list_key(path, rows // 2)
+    return {
+        "server list open": lambda: scanner.get_servers_page(limit=3 * page),
+        "server list scroll": lambda: scanner.get_servers_page(after=key, limit=page),
+        "server list jump": lambda: scanner.get_servers_page(offset=rows // 2, limit=3 * page),
+        "server list search": lambda: (scanner.count_servers("Server #12"),
+                                       scanner.get_servers_page("Server #12", limit=3 * page)),
+    }
+
+
+def register_db_benchmarks(sizes):
+    for rows in sizes:
+        for name in SERVER_LIST_QUERIES:
+            def setup(tmp, rows=rows, name=name):
+                path = os.path.join(tmp, f"servers_{rows}.db")
+                fill_database(path, rows)
+                query = server_list_queries(path, rows)[name]
+
+                def run():
+                    scanner.DATABASE_FILE = path
+                    query()
+                return run
+            BENCHMARKS.append((f"{name} ({rows:,} rows)", setup, 3))
+
+
+# ========= SENT LIST =========
+@benchmark("mark_sent (new key)", repeat=3)
+def bench_mark_sent(tmp):
+    scanner.SENT_FILE = os.path.join(tmp, "sent.txt")
+    scanner.sent_set = set()
+    counter = iter(range(10 ** 9))
+
+    async def batch():
+        for _ in range(100):
+            await scanner.mark_sent(f"10.0.0.1:{next(counter)}")
+
+    # 100 calls per run so the event loop start-up is not measured
+    return lambda: asyncio.run(batch()), 100
+
+
+# ========= RUNNER =========
+def measure(fn, repeat: int) -> float:
+    """Best seconds per call of fn()"""
+    timer = timeit.Timer(fn)
+    loops, _ = timer.autorange()
+    return min(timer.repeat(repeat, loops)) / loops
+
+
+def format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit:<2}"
+    return f"{seconds / 1e-9:8.1f} ns"
+
+
+def load_baseline(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"results": {}}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--filter", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--db-rows", default="10000,100000,1000000")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--max-regression", type=float, default=0.0,
+                        help="exit with status 1 when a benchmark is this many percent slower")
+    args = parser.parse_args()
+
+    register_db_benchmarks(int(n) for n in args.db_rows.split(",") if n)
+    baseline = load_baseline(args.baseline)
+    if baseline.get("machine") and baseline["machine"] != platform.node():
+        print(f"[BENCH] Baseline was recorded on {baseline['machine']}, not on this machine")
+
+    results = {}
+    regressions = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, setup, repeat in BENCHMARKS:
+            if args.filter not in name:
+                continue
+            fn = setup(tmp)
+            per_call = 1
+            if isinstance(fn, tuple):
+                fn, per_call = fn
+            seconds = measure(fn, repeat) / per_call
+            results[name] = seconds
+
+            line = f"[BENCH] {name:<36} {format_time(seconds)}/op"
+            base = baseline["results"].get(name)
+            if base:
+                change = (seconds - base) / base * 100
+                line += f"   baseline {format_time(base)}  {change:+7.1f}%"
+                if args.max_regression and change > args.max_regression:
+                    line += "  REGRESSION"
+                    regressions.append(name)
+            print(line, flush=True)
+
+    if args.save:
+        baseline["results"].update(results)
+        baseline.update(machine=platform.node(), python=platform.python_version(),
+                        saved=time.strftime("%Y-%m-%d %H:%M:%S"))
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"[BENCH] Baseline saved to {args.baseline}")
+
+    if regressions:
+        print(f"[BENCH] FAIL: {len(regressions)} benchmark(s) regressed more than {args.max_regression}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Fake Minecraft server farm for offline benchmarks
+
+Serves Server List Ping responses from many asyncio listeners on loopback
+addresses and port ranges. Linux routes all of 127.0.0.0/8 to the loopback
+interface, so every 127.x.y.z address can be bound without configuring
+aliases. Every accepted connection gets one of these fates, drawn at random:
+
+    drop        closed with a RST right after accept
+    blackhole   accepted but never answered (exercises the first-byte timeout)
+    malformed   a broken frame (bad varint, truncated frame or invalid JSON)
+    answered    a status response of about --response-size bytes after a
+                delay from the --latency distribution
+
+Addresses outside the farm refuse the connection, like most of the internet.
+
+    python benchmarks/fake_server_farm.py [--hosts 256] [--ports 25565-25568]
+        [--latency exp:0.02] [--drop 0.02] [--blackhole 0.01] [--malformed 0.01]
+"""
+import argparse
+import asyncio
+import ipaddress
+import json
+import math
+import os
+import random
+import sys
+import time
+from typing import Callable, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ressources.packets import encode_varint
+from ressources.sockets import raise_fd_limit
+
+FIRST_HOST = "127.0.1.1"
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    Response delay distribution in seconds:
+    "none", "const:S", "uniform:MIN:MAX", "exp:MEAN", "lognormal:MEDIAN:SIGMA"
+    """
+    kind, _, rest = spec.partition(":")
+    values = [float(v) for v in rest.split(":")] if rest else []
+    if kind == "none" and not values:
+        return lambda rng: 0.0
+    if kind == "const" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "exp" and len(values) == 1 and values[0] > 0:
+        return lambda rng: rng.expovariate(1.0 / values[0])
+    if kind == "lognormal" and len(values) == 2 and values[0] > 0:
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    raise ValueError(f"invalid latency distribution: {spec}")
+
+
+def parse_ports(text: str) -> List[int]:
+    """"25565-25568,25570" -> [25565, 25566, 25567, 25568, 25570]"""
+    ports = set()
+    for part in text.split(","):
+        first, _, last = part.strip().partition("-")
+        ports.update(range(int(first), int(last or first) + 1))
+    return sorted(ports)
+
+
+def host_addresses(count: int, first: str = FIRST_HOST) -> List[str]:
+    """`count` consecutive loopback addresses starting at `first`"""
+    start = int(ipaddress.IPv4Address(first))
+    return [str(ipaddress.IPv4Address(start + i)) for i in range(count)]
+
+
+def frame(payload: bytes) -> bytes:
+    return encode_varint(len(payload)) + payload
+
+
+def status_frame(size: int) -> bytes:
+    """Status response frame of roughly `size` bytes (the MOTD is padded)"""
+    status = {
+        "version": {"name": "1.20.4", "protocol": 765},
+        "players": {"max": 20, "online": 1},
+        "description": {"text": ""},
+    }
+    base = len(json.dumps(status)) + 8
+    status["description"]["text"] = "x" * max(0, size - base)
+    body = json.dumps(status).encode()
+    return frame(encode_varint(0) + encode_varint(len(body)) + body)
+
+
+MALFORMED_FRAMES = (
+    b"\xff\xff\xff\xff\xff\x01",                                   # varint longer than 5 bytes
+    encode_varint(4096) + encode_varint(0) + b"{\"truncated",       # frame shorter than announced
+    frame(encode_varint(0) + encode_varint(9) + b"not json!"),     # valid frame, invalid JSON
+)
+
+
+# ========= FARM =========
+class FakeServerFarm:
+    """Many SLP responders in one event loop, see the module docstring."""
+
+    def __init__(self, hosts: List[str], ports: List[int], response_size: int = 512,
+                 latency: str = "none", drop: float = 0.0, blackhole: float = 0.0,
+                 malformed: float = 0.0, seed: Optional[int] = None):
+        if drop + blackhole + malformed > 1.0:
+            raise ValueError("drop + blackhole + malformed rates exceed 1.0")
+        self.hosts = hosts
+        self.ports = ports
+        self.response = status_frame(response_size)
+        self.delay = parse_latency(latency)
+        self.drop = drop
+        self.blackhole = blackhole
+        self.malformed = malformed
+        self.rng = random.Random(seed)
+        self.servers: List[asyncio.AbstractServer] = []
+        self.stats = {"connections": 0, "answered": 0, "dropped": 0, "blackholed": 0, "malformed": 0}
+
+    async def start(self) -> int:
+        """Bind every host/port pair. Returns the number of listeners."""
+        for host in self.hosts:
+            for port in self.ports:
+                self.servers.append(await asyncio.start_server(
+                    self._handle, host, port, reuse_address=True, backlog=1024))
+        return len(self.servers)
+
+    async def stop(self):
+        for server in self.servers:
+            server.close()
+        for server in self.servers:
+            await server.wait_closed()
+        self.servers = []
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        stats = self.stats
+        stats["connections"] += 1
+        fate = self.rng.random()
+        try:
+            if fate < self.drop:
+                stats["dropped"] += 1
+                writer.transport.abort()
+                return
+            fate -= self.drop
+            if fate < self.blackhole:
+                stats["blackholed"] += 1
+                # Hold the connection until the scanner gives up
+                while await reader.read(4096):
+                    pass
+                return
+            fate -= self.blackhole
+
+            await reader.read(1024)  # handshake + status request
+            delay = self.delay(self.rng)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if fate < self.malformed:
+                stats["malformed"] += 1
+                writer.write(self.rng.choice(MALFORMED_FRAMES))
+            else:
+                stats["answered"] += 1
+                writer.write(self.response)
+            await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
+
+
+def add_farm_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--hosts", type=int, default=256, help="loopback addresses to listen on")
+    parser.add_argument("--first-host", default=FIRST_HOST)
+    parser.add_argument("--ports", default="25565-25568", help="port range per host")
+    parser.add_argument("--response-size", type=int, default=512, help="status response bytes")
+    parser.add_argument("--latency", default="exp:0.005",
+                        help="none | const:S | uniform:MIN:MAX | exp:MEAN | lognormal:MEDIAN:SIGMA")
+    parser.add_argument("--drop", type=float, default=0.02, help="share of connections reset at once")
+    parser.add_argument("--blackhole", type=float, default=0.01, help="share of connections never answered")
+    parser.add_argument("--malformed", type=float, default=0.01, help="share of broken responses")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def farm_from_args(args) -> FakeServerFarm:
+    return FakeServerFarm(host_addresses(args.hosts, args.first_host), parse_ports(args.ports),
+                          args.response_size, args.latency, args.drop, args.blackhole,
+                          args.malformed, args.seed)
+
+
+async def serve(args):
+    raise_fd_limit()
+    farm = farm_from_args(args)
+    listeners = await farm.start()
+    print(f"[FARM] {listeners} listeners on {args.hosts} hosts from {args.first_host}, ports {args.ports}")
+    try:
+        while True:
+            await asyncio.sleep(5)
+            print(f"[FARM] {time.strftime('%H:%M:%S')} {farm.stats}")
+    finally:
+        await farm.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    add_farm_arguments(parser)
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
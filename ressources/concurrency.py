@@ -0,0 +1,144 @@
+import asyncio
+from collections import deque
+from typing import Dict, Optional
+
+from ressources.slp import LOCAL_ERROR, TIMEOUT
+from ressources.sockets import SocketBudget
+
+
+# ========= ADAPTIVE LIMITER =========
+class AdaptiveLimiter:
+    """
+    Semaphore whose limit is adjusted at runtime (AIMD).
+    Every `interval` seconds the connect outcomes recorded since the last
+    adjustment are checked: local errors (out of fds/ports/buffers), a
+    timeout rate clearly above its running baseline, event loop lag above
+    `max_loop_lag` or too few free file descriptors / local ports (from
+    `budget`, a SocketBudget) shrink the limit by `decrease`
+    (multiplicative), otherwise it grows by `step` (additive).
+    The limit always stays within [minimum, maximum].
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, step: Optional[int] = None,
+                 decrease: float = 0.75, interval: float = 1.0, max_loop_lag: float = 0.1,
+                 min_samples: int = 100, budget: Optional[SocketBudget] = None):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.step = step or max(1, self.maximum // 50)
+        self.decrease = decrease
+        self.interval = interval
+        self.max_loop_lag = max_loop_lag
+        self.min_samples = min_samples
+        self.budget = budget
+
+        self.in_flight = 0
+        self._waiters = deque()
+        self._outcomes: Dict[str, int] = {}
+        self.timeout_baseline: Optional[float] = None
+        self.loop_lag = 0.0
+        self.decision = "starting"
+
+    @property
+    def adaptive(self) -> bool:
+        return self.minimum < self.maximum
+
+    # ----- Semaphore interface -----
+    async def acquire(self):
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just before the cancellation
+                self.release()
+            raise
+
+    def release(self):
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self.in_flight < self.limit:
+            future = self._waiters.popleft()
+            if not future.done():
+                self.in_flight += 1
+                future.set_result(None)
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, *exc):
+        self.release()
+
+    # ----- Feedback -----
+    def record(self, outcome: str):
+        """Count one connect outcome (see ressources.slp)"""
+        self._outcomes[outcome] = self._outcomes.get(outcome, 0) + 1
+
+    def adjust(self, loop_lag: float = 0.0) -> str:
+        """Apply one AIMD step from the outcomes since the last call. Returns the decision."""
+        outcomes, self._outcomes = self._outcomes, {}
+        self.loop_lag = loop_lag
+        if not self.adaptive:
+            self.decision = "fixed"
+            return self.decision
+
+        total = sum(outcomes.values())
+        local_errors = outcomes.get(LOCAL_ERROR, 0)
+        timeout_rate = outcomes.get(TIMEOUT, 0) / total if total >= self.min_samples else None
+        fds = ports = None
+        if self.budget is not None:
+            fds = self.budget.free_fds()
+            ports = self.budget.free_ports()
+
+        reason = None
+        if local_errors:
+            reason = f"{local_errors} local errors"
+        elif loop_lag > self.max_loop_lag:
+            reason = f"loop lag {loop_lag * 1000:.0f} ms"
+        elif fds is not None and fds < self.step * 2:
+            reason = f"{fds} free fds"
+        elif ports is not None and ports < self.step * 2:
+            reason = f"{ports} free local ports"
+        elif (timeout_rate is not None and self.timeout_baseline is not None
+              and timeout_rate > self.timeout_baseline * 1.2 + 0.05):
+            reason = f"timeouts {timeout_rate:.0%} > {self.timeout_baseline:.0%}"
+
+        if reason:
+            self.limit = max(self.minimum, int(self.limit * self.decrease))
+            self.decision = f"down ({reason})"
+        else:
+            # Only learn the "normal" timeout rate while things are healthy
+            if timeout_rate is not None:
+                if self.timeout_baseline is None:
+                    self.timeout_baseline = timeout_rate
+                else:
+                    self.timeout_baseline += (timeout_rate - self.timeout_baseline) * 0.1
+            if self.limit < self.maximum and total and self.in_flight >= self.limit * 0.9:
+                self.limit = min(self.maximum, self.limit + self.step)
+                self.decision = "up"
+            else:
+                self.decision = "hold"
+        self._wake()
+        return self.decision
+
+    async def run(self):
+        """Adjust the limit every `interval` seconds, measuring event loop lag on the way"""
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            if self.budget is not None:
+                # /proc reads, kept off the event loop
+                await loop.run_in_executor(None, self.budget.refresh)
+            self.adjust(lag)
+
+    def status(self) -> str:
+        """Short text for the GUI"""
+        return f"{self.limit} ({self.in_flight} busy) - {self.decision}"
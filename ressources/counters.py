@@ -0,0 +1,44 @@
+import threading
+from typing import Dict, Hashable, List
+
+
+# ========= SHARDED COUNTERS =========
+class ShardedCounters:
+    """
+    Named integer counters without a lock on the hot path.
+    Every writer thread increments its own dict shard (only that thread
+    writes to it), readers add the shards up. snapshot() copies each shard
+    in one step, so reading never blocks or disturbs the writers.
+    Keys can be any hashable, e.g. "scanned" or (25565, "open").
+    """
+
+    def __init__(self, *names: Hashable):
+        self._names = names
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._register = threading.Lock()
+
+    def _new_shard(self) -> dict:
+        shard = dict.fromkeys(self._names, 0)
+        with self._register:
+            self._shards.append(shard)
+        self._local.shard = shard
+        return shard
+
+    def add(self, name: Hashable, n: int = 1):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard[name] = shard.get(name, 0) + n
+
+    def value(self, name: Hashable) -> int:
+        return sum(shard.get(name, 0) for shard in list(self._shards))
+
+    def snapshot(self) -> Dict[Hashable, int]:
+        """Consistent-enough totals of all counters across all threads"""
+        totals = dict.fromkeys(self._names, 0)
+        for shard in list(self._shards):
+            for name, value in shard.copy().items():
+                totals[name] = totals.get(name, 0) + value
+        return totals
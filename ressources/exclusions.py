@@ -0,0 +1,215 @@
+import ipaddress
+import os
+import socket
+import struct
+import threading
+import time
+from bisect import bisect_right
+from typing import Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_unpack_ip = struct.Struct("!I").unpack
+
+
+def ip_value(ip: str) -> int:
+    """
+    Dotted-quad address as an integer. Unlike inet_aton, inet_pton only
+    accepts all four octets ("10.1" is an error, not 10.0.0.1).
+    """
+    return _unpack_ip(socket.inet_pton(socket.AF_INET, ip))[0]
+
+
+def parse_cidr(text: str) -> Tuple[int, int]:
+    """Parse "a.b.c.d/m" or a single address into a [start, end) interval"""
+    try:
+        network = ipaddress.IPv4Network(text.strip(), strict=False)
+    except ValueError as e:
+        raise ValueError(f"invalid address or prefix {text!r}: {e}") from None
+    start = int(network.network_address)
+    return start, start + network.num_addresses
+
+
+def compile_intervals(intervals: Iterable[Tuple[int, int]]) -> Tuple[List[int], List[int]]:
+    """Sort and merge intervals into parallel start/end lists for bisect lookups"""
+    starts: List[int] = []
+    ends: List[int] = []
+    for start, end in sorted(intervals):
+        if ends and start <= ends[-1]:
+            if end > ends[-1]:
+                ends[-1] = end
+        else:
+            starts.append(start)
+            ends.append(end)
+    return starts, ends
+
+
+def build_slash16_index(starts: List[int], ends: List[int]) -> bytearray:
+    """
+    One byte per /16: 0 = nothing excluded, 1 = partially excluded (needs a
+    bisect), 2 = fully excluded. Most lookups are answered by this table.
+    """
+    index = bytearray(65536)
+    for start, end in zip(starts, ends):
+        first, last = start >> 16, (end - 1) >> 16
+        for block in range(first, last + 1):
+            block_start = block << 16
+            if start <= block_start and end >= block_start + 65536:
+                index[block] = 2
+            elif index[block] == 0:
+                index[block] = 1
+    return index
+
+
+class ExclusionList:
+    """
+    Operator exclusion list loaded from a CIDR file (one prefix or address
+    per line, "#" starts a comment).
+    Prefixes are compiled into sorted, merged intervals plus a /16 index, so
+    most lookups are one table read and the rest one bisect, no matter how
+    many prefixes are listed. The compiled table is swapped atomically on
+    reload, lookups never see a half-loaded list.
+    Call load() once after creating it. maybe_reload() parses a changed file
+    in a background thread, so it can be called from the event loop.
+    """
+
+    def __init__(self, path: Optional[str] = None, reload_interval: float = 5.0):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.prefix_count = 0
+        self._table = self._compile([])
+        self._mtime: Optional[float] = None  # Version last parsed, even if it was broken
+        self._last_check = 0.0
+        self._reloading = False
+        self._result = None  # (error, table, prefix count) of a finished background reload
+
+    def load(self) -> int:
+        """(Re)load the file now. Returns the number of prefixes, keeps the old list on errors."""
+        try:
+            self._mtime = os.path.getmtime(self.path)
+        except OSError:
+            # No file (yet) = nothing excluded
+            self._table = self._compile([])
+            self.prefix_count = 0
+            self._mtime = None
+            return 0
+        self._table, self.prefix_count = self._parse()
+        return self.prefix_count
+
+    def _parse(self):
+        """Read and compile the file. Returns (table, prefix count), raises ValueError on a bad line."""
+        intervals = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                entry = line.split("#", 1)[0].strip()
+                if not entry:
+                    continue
+                try:
+                    intervals.append(parse_cidr(entry))
+                except ValueError as e:
+                    raise ValueError(f"{self.path}:{line_no}: {e}") from None
+        return self._compile(intervals), len(intervals)
+
+    @staticmethod
+    def _compile(intervals):
+        starts, ends = compile_intervals(intervals)
+        index = build_slash16_index(starts, ends)
+        if np is None:
+            return starts, ends, index, None, None
+        return (starts, ends, index,
+                np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64))
+
+    def maybe_reload(self) -> bool:
+        """
+        Reload if the file changed, without blocking: a changed file is
+        parsed in a background thread and swapped in by a later call.
+        Checks at most every `reload_interval` seconds. Returns True when a
+        new list was swapped in, raises the error of a failed reload once
+        (the old list stays; that version of the file is not parsed again).
+        """
+        result = self._result
+        if result is not None:
+            self._result = None
+            error, table, count = result
+            if error is not None:
+                raise error
+            self._table, self.prefix_count = table, count
+            return True
+        if not self.path or self._reloading:
+            return False
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return False
+        self._last_check = now
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        self._reloading = True
+        threading.Thread(target=self._reload, args=(mtime is not None,),
+                         name="exclusion-reload", daemon=True).start()
+        return False
+
+    def _reload(self, exists: bool):
+        try:
+            if exists:
+                table, count = self._parse()
+            else:
+                table, count = self._compile([]), 0  # File removed = nothing excluded
+            self._result = (None, table, count)
+        except Exception as e:
+            self._result = (e, None, 0)
+        finally:
+            self._reloading = False
+
+    def contains_int(self, ip: int) -> bool:
+        starts, ends, index = self._table[:3]
+        state = index[ip >> 16]
+        if state != 1:
+            return state == 2
+        i = bisect_right(starts, ip) - 1
+        return i >= 0 and ip < ends[i]
+
+    def __contains__(self, ip: str) -> bool:
+        if not self._table[0]:
+            return False
+        return self.contains_int(ip_value(ip))
+
+    def __len__(self) -> int:
+        return len(self._table[0])
+
+    def filter(self, ips: Iterable[str]) -> List[str]:
+        """Return the addresses of `ips` that are not excluded"""
+        starts, ends, index = self._table[:3]
+        if not starts:
+            return list(ips)
+        pton = socket.inet_pton
+        af_inet = socket.AF_INET
+        unpack = _unpack_ip
+        kept = []
+        for ip in ips:
+            value = unpack(pton(af_inet, ip))[0]
+            state = index[value >> 16]
+            if state == 1:
+                i = bisect_right(starts, value) - 1
+                if i >= 0 and value < ends[i]:
+                    continue
+            elif state == 2:
+                continue
+            kept.append(ip)
+        return kept
+
+    def mask_array(self, ips):
+        """Vectorized lookup for a NumPy array of integer addresses (True = excluded)"""
+        starts, _, _, np_starts, np_ends = self._table
+        if not starts:
+            return np.zeros(len(ips), dtype=bool)
+        values = ips.astype(np.int64)
+        idx = np.searchsorted(np_starts, values, side="right") - 1
+        return (idx >= 0) & (values < np_ends[np.maximum(idx, 0)])
@@ -0,0 +1,109 @@
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+# ========= LATENCY HISTOGRAM =========
+class LatencyHistogram:
+    """
+    Log-bucketed latency histogram (seconds).
+    Bucket boundaries grow by a factor of 2 ** (1 / sub_buckets) from
+    `min_value` up to `max_value`, so the relative error is the same at
+    1 ms and at 10 s and recording is one log2() and an increment.
+    Values below/above the range land in the first/last bucket.
+    record() must only be called from one thread (the event loop).
+    Histograms with the same parameters can be merged, to_dict() gives a
+    compact form for sending them to the master.
+    """
+
+    def __init__(self, min_value: float = 0.0001, max_value: float = 60.0, sub_buckets: int = 4):
+        self.min_value = min_value
+        self.sub_buckets = sub_buckets
+        self.size = int(math.ceil(math.log2(max_value / min_value) * sub_buckets)) + 1
+        self.counts = [0] * self.size
+        self.count = 0
+        self.sum = 0.0
+
+    def record(self, value: float):
+        if value <= self.min_value:
+            index = 0
+        else:
+            index = min(self.size - 1, int(math.log2(value / self.min_value) * self.sub_buckets) + 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+    def upper_bound(self, index: int) -> float:
+        """Upper edge of bucket `index` in seconds"""
+        return self.min_value * 2 ** (index / self.sub_buckets)
+
+    def cumulative_buckets(self) -> List[Tuple[float, int]]:
+        """(upper bound, samples <= bound) at every power of two, for Prometheus"""
+        out = []
+        running = 0
+        counts = list(self.counts)
+        for index, value in enumerate(counts):
+            running += value
+            if index % self.sub_buckets == 0 and index < self.size - 1:
+                out.append((self.upper_bound(index), running))
+        return out
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Approximate q-th percentile (0-100) in seconds, None without samples"""
+        counts = list(self.counts)
+        total = sum(counts)
+        if not total:
+            return None
+        rank = max(1, math.ceil(total * q / 100.0))
+        running = 0
+        for index, value in enumerate(counts):
+            running += value
+            if running >= rank:
+                if index == 0:
+                    return self.min_value
+                # Geometric middle of the bucket
+                return self.upper_bound(index - 0.5)
+        return self.upper_bound(self.size - 1)
+
+    def merge(self, other: "LatencyHistogram"):
+        for index, value in enumerate(other.counts):
+            if value:
+                self.counts[index] += value
+        self.count += other.count
+        self.sum += other.sum
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Sparse form: {"b": [[bucket, count], ...], "n": count, "s": sum}"""
+        return {
+            "b": [[index, value] for index, value in enumerate(self.counts) if value],
+            "n": self.count,
+            "s": round(self.sum, 6),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        hist = cls()
+        for index, value in data.get("b", ()):
+            if 0 <= index < hist.size:
+                hist.counts[index] += value
+        hist.count = data.get("n", 0)
+        hist.sum = data.get("s", 0.0)
+        return hist
+
+
+def merge_histograms(histograms: Iterable[LatencyHistogram]) -> LatencyHistogram:
+    """Sum of several histograms (all with default parameters)"""
+    total = LatencyHistogram()
+    for hist in histograms:
+        total.merge(hist)
+    return total
+
+
+def format_percentiles(hist: LatencyHistogram) -> str:
+    """GUI text like: p50 1.2ms  p90 8.4ms  p99 41ms  (n=1234)"""
+    def ms(value):
+        if value is None:
+            return "-"
+        value *= 1000.0
+        return f"{value:.1f}ms" if value < 100 else f"{value:.0f}ms"
+    return (f"p50 {ms(hist.percentile(50))}  p90 {ms(hist.percentile(90))}  "
+            f"p99 {ms(hist.percentile(99))}  (n={hist.count})")
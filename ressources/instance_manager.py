@@ -5,17 +5,46 @@ import time
 import os
 import sys
 import errno
-from typing import Dict, Any, Optional, Callable
-from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Optional, Callable
+from dataclasses import dataclass, asdict, field
 
 # IPC Configuration
 IPC_HOST = "127.0.0.1"
 IPC_PORT = 9999
-IPC_BUFFER_SIZE = 4096
+IPC_BUFFER_SIZE = 65536
 MAX_RECONNECT_ATTEMPTS = 5
 RECONNECT_DELAY = 2.0
 
 
+# ========= FRAMING =========
+# Every message is one JSON document followed by "\n". json.dumps never
+# emits a raw newline, so TCP may split or merge messages freely.
+def send_message(sock: socket.socket, payload: str):
+    """Send one newline-terminated message"""
+    sock.sendall(payload.encode('utf-8') + b"\n")
+
+
+class MessageReader:
+    """Splits the byte stream of a socket into newline-delimited messages"""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self.buffer = b""
+
+    def read(self) -> Optional[str]:
+        """
+        Next complete message, None when the peer closed the connection.
+        Raises socket.timeout like recv(); partial data stays buffered.
+        """
+        while b"\n" not in self.buffer:
+            data = self.sock.recv(IPC_BUFFER_SIZE)
+            if not data:
+                return None
+            self.buffer += data
+        line, self.buffer = self.buffer.split(b"\n", 1)
+        return line.decode('utf-8')
+
+
 @dataclass
 class StatsMessage:
     """Message format for stats exchange between instances"""
@@ -30,6 +59,8 @@ class StatsMessage:
     peak_found_per_minute: float = 0.0
     scans_per_minute: float = 0.0
     found_per_minute: float = 0.0
+    # Latency histograms per phase (LatencyHistogram.to_dict())
+    latency: Dict[str, Any] = field(default_factory=dict)
     
     def to_json(self) -> str:
         return json.dumps(asdict(self))
@@ -78,6 +109,9 @@ class InstanceManager:
         self.is_master = False
         self.instance_id = f"{os.getpid()}_{int(time.time() * 1000)}"
         self.master_socket: Optional[socket.socket] = None
+        self.master_reader: Optional[MessageReader] = None
+        # Worker: one request/response exchange on master_socket at a time
+        self.master_lock = threading.Lock()
         self.server_socket: Optional[socket.socket] = None
         self.worker_sockets: Dict[str, socket.socket] = {}
         self.worker_stats: Dict[str, StatsMessage] = {}
@@ -93,6 +127,11 @@ class InstanceManager:
         # Worker callback for server broadcasts
         self.server_broadcast_callback: Optional[Callable[[str], None]] = None
         
+        # Commands for workers (master only), delivered with the next stats ack
+        self.pending_commands: Dict[str, List[Dict[str, Any]]] = {}
+        # Worker callback for commands from the master
+        self.command_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+        
         # Connection health tracking
         self.last_heartbeat = time.time()
         self.heartbeat_lock = threading.Lock()
@@ -160,6 +199,7 @@ class InstanceManager:
             self.master_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.master_socket.settimeout(5.0)
             self.master_socket.connect((IPC_HOST, IPC_PORT))
+            self.master_reader = MessageReader(self.master_socket)
             self.running = True
             self.reconnect_attempts = 0
             
@@ -225,17 +265,16 @@ class InstanceManager:
     def _handle_worker(self, client_socket: socket.socket):
         """Handle communication with a single worker"""
         client_socket.settimeout(5.0)
+        reader = MessageReader(client_socket)
         worker_id = None
         
         try:
             while self.running:
                 try:
-                    data = client_socket.recv(IPC_BUFFER_SIZE)
-                    if not data:
+                    decoded_data = reader.read()
+                    if decoded_data is None:
                         break
                     
-                    decoded_data = data.decode('utf-8')
-                    
                     # Try to parse as StatsMessage first
                     try:
                         message = StatsMessage.from_json(decoded_data)
@@ -257,12 +296,14 @@ class InstanceManager:
                                 if self.stats_callback:
                                     self.stats_callback(message)
                         
-                        # Send acknowledgment
-                        ack = json.dumps({"status": "ok"})
-                        try:
-                            client_socket.send(ack.encode('utf-8'))
-                        except (BrokenPipeError, OSError):
-                            break
+                        # Send acknowledgment (with queued commands for this worker)
+                        with self.lock:
+                            commands = self.pending_commands.pop(worker_id, None)
+                            ack = json.dumps({"status": "ok", "commands": commands} if commands else {"status": "ok"})
+                            try:
+                                send_message(client_socket, ack)
+                            except (BrokenPipeError, OSError):
+                                break
                         continue
                         
                     except (json.JSONDecodeError, TypeError, KeyError):
@@ -287,7 +328,9 @@ class InstanceManager:
                             already_sent=already_sent
                         )
                         try:
-                            client_socket.send(response.to_json().encode('utf-8'))
+                            # Under self.lock, so it cannot interleave with a broadcast
+                            with self.lock:
+                                send_message(client_socket, response.to_json())
                         except (BrokenPipeError, OSError):
                             break
                         continue
@@ -295,6 +338,8 @@ class InstanceManager:
                     except (json.JSONDecodeError, TypeError, KeyError):
                         pass
                     
+                    print(f"[MASTER] Dropped unreadable message from worker: {decoded_data[:80]!r}")
+                    
                 except socket.timeout:
                     continue
                 except (ConnectionResetError, BrokenPipeError, OSError):
@@ -312,6 +357,7 @@ class InstanceManager:
                         del self.worker_sockets[worker_id]
                     if worker_id in self.worker_stats:
                         del self.worker_stats[worker_id]
+                    self.pending_commands.pop(worker_id, None)
                     if self.disconnect_callback:
                         self.disconnect_callback(worker_id)
             try:
@@ -327,7 +373,7 @@ class InstanceManager:
             already_sent=True,
             broadcast=True
         )
-        message_data = broadcast_msg.to_json().encode('utf-8')
+        message_data = broadcast_msg.to_json()
         
         dead_workers = []
         
@@ -335,7 +381,7 @@ class InstanceManager:
             for worker_id, worker_socket in self.worker_sockets.items():
                 if worker_id != exclude_worker:
                     try:
-                        worker_socket.send(message_data)
+                        send_message(worker_socket, message_data)
                     except (BrokenPipeError, ConnectionResetError, OSError):
                         dead_workers.append(worker_id)
                     except Exception as e:
@@ -375,9 +421,48 @@ class InstanceManager:
                 break
 
     
+    def _receive_reply(self, timeout: float, is_reply: Callable[[Dict[str, Any]], bool]) -> Optional[Dict[str, Any]]:
+        """
+        Read messages from the master until one matches `is_reply`, handing
+        broadcasts and commands read on the way to their callbacks. Returns
+        None after `timeout` seconds; a reply that arrives later stays
+        buffered and is handled (and its commands run) by the next call.
+        Caller holds master_lock.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            self.master_socket.settimeout(remaining)
+            try:
+                data = self.master_reader.read()
+            except socket.timeout:
+                return None
+            if data is None:
+                raise ConnectionResetError("master closed the connection")
+            try:
+                msg = json.loads(data)
+            except json.JSONDecodeError as e:
+                print(f"[WORKER] Dropped unreadable message from master ({e}): {data[:80]!r}")
+                continue
+            if msg.get("broadcast"):
+                if self.server_broadcast_callback:
+                    self.server_broadcast_callback(msg.get("server_key"))
+                continue
+            if msg.get("commands") and self.command_callback:
+                for command in msg["commands"]:
+                    try:
+                        self.command_callback(command)
+                    except Exception as e:
+                        print(f"[WORKER] Command {command} failed: {e}")
+            if is_reply(msg):
+                return msg
+
     def send_worker_stats(self, scanned: int, found: int, with_players: int, sent_count: int,
                           peak_scans_per_minute: float = 0.0, peak_found_per_minute: float = 0.0,
-                          scans_per_minute: float = 0.0, found_per_minute: float = 0.0):
+                          scans_per_minute: float = 0.0, found_per_minute: float = 0.0,
+                          latency: Optional[Dict[str, Any]] = None):
         """Send stats update from worker to master"""
         if not self.master_socket or not self.running:
             return
@@ -396,27 +481,18 @@ class InstanceManager:
                 peak_scans_per_minute=peak_scans_per_minute,
                 peak_found_per_minute=peak_found_per_minute,
                 scans_per_minute=scans_per_minute,
-                found_per_minute=found_per_minute
+                found_per_minute=found_per_minute,
+                latency=latency or {}
             )
-            self.master_socket.send(message.to_json().encode('utf-8'))
-            
-            # Update heartbeat timestamp
-            with self.heartbeat_lock:
-                self.last_heartbeat = time.time()
-            
-            # Receive acknowledgment (non-blocking check for server broadcasts)
-            self.master_socket.settimeout(0.1)
-            try:
-                data = self.master_socket.recv(IPC_BUFFER_SIZE)
-                # Check if it's a broadcast message
-                try:
-                    msg = json.loads(data.decode('utf-8'))
-                    if msg.get("broadcast") and self.server_broadcast_callback:
-                        self.server_broadcast_callback(msg.get("server_key"))
-                except:
-                    pass
-            except socket.timeout:
-                pass
+            with self.master_lock:
+                send_message(self.master_socket, message.to_json())
+                
+                # Update heartbeat timestamp
+                with self.heartbeat_lock:
+                    self.last_heartbeat = time.time()
+                
+                # Receive acknowledgment (short wait, also picks up server broadcasts)
+                self._receive_reply(0.1, lambda m: "status" in m)
         except (ConnectionResetError, BrokenPipeError, OSError) as e:
             print(f"[WORKER] Connection lost: {e}")
             self.reconnect_attempts += 1
@@ -440,12 +516,14 @@ class InstanceManager:
                 server_key=server_key,
                 message_type="check_server"
             )
-            self.master_socket.send(message.to_json().encode('utf-8'))
-            
-            # Wait for response
-            self.master_socket.settimeout(5.0)
-            data = self.master_socket.recv(IPC_BUFFER_SIZE)
-            response = ServerResponseMessage.from_json(data.decode('utf-8'))
+            with self.master_lock:
+                send_message(self.master_socket, message.to_json())
+                
+                # Wait for the response to this key
+                msg = self._receive_reply(5.0, lambda m: m.get("server_key") == server_key)
+            if msg is None:
+                raise socket.timeout("no response from master")
+            response = ServerResponseMessage(**msg)
             
             # Update heartbeat timestamp
             with self.heartbeat_lock:
@@ -477,12 +555,14 @@ class InstanceManager:
                 server_key=server_key,
                 message_type="mark_server"
             )
-            self.master_socket.send(message.to_json().encode('utf-8'))
-            
-            # Wait for response
-            self.master_socket.settimeout(5.0)
-            data = self.master_socket.recv(IPC_BUFFER_SIZE)
-            response = ServerResponseMessage.from_json(data.decode('utf-8'))
+            with self.master_lock:
+                send_message(self.master_socket, message.to_json())
+                
+                # Wait for the response to this key
+                msg = self._receive_reply(5.0, lambda m: m.get("server_key") == server_key)
+            if msg is None:
+                raise socket.timeout("no response from master")
+            response = ServerResponseMessage(**msg)
             
             # Update heartbeat timestamp
             with self.heartbeat_lock:
@@ -503,6 +583,22 @@ class InstanceManager:
         """Set callback for receiving server broadcasts from master"""
         self.server_broadcast_callback = callback
 
+    def set_command_callback(self, callback: Callable[[Dict[str, Any]], None]):
+        """Set callback for commands sent by the master (e.g. {"command": "profile", "seconds": 30})"""
+        self.command_callback = callback
+
+    def send_command_to_workers(self, command: str, **args) -> int:
+        """
+        Queue a command for all connected workers (master only). It is
+        delivered with the acknowledgment of each worker's next stats update.
+        Returns the number of workers it was queued for.
+        """
+        message = {"command": command, **args}
+        with self.lock:
+            for worker_id in self.worker_sockets:
+                self.pending_commands.setdefault(worker_id, []).append(message)
+            return len(self.worker_sockets)
+
     
     def disconnect_worker(self):
         """Send disconnect message and close worker connection"""
@@ -513,7 +609,8 @@ class InstanceManager:
                     scanned=0, found=0, with_players=0, sent_count=0,
                     is_disconnect=True
                 )
-                self.master_socket.send(message.to_json().encode('utf-8'))
+                with self.master_lock:
+                    send_message(self.master_socket, message.to_json())
                 time.sleep(0.1)  # Give time for message to be sent
             except:
                 pass
@@ -570,7 +667,8 @@ class InstanceManager:
                         "peak_scans_per_minute": s.peak_scans_per_minute,
                         "peak_found_per_minute": s.peak_found_per_minute,
                         "scans_per_minute": s.scans_per_minute,
-                        "found_per_minute": s.found_per_minute
+                        "found_per_minute": s.found_per_minute,
+                        "latency": s.latency
                     }
                     for wid, s in self.worker_stats.items()
                 }
@@ -0,0 +1,33 @@
+import asyncio
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+LOOP_CHOICES = ("auto", "uvloop", "asyncio")
+
+
+def install_event_loop(name: str = "auto") -> str:
+    """
+    Select the event loop implementation used by asyncio.run() from now on.
+    "auto" takes uvloop when it is installed, "uvloop" asks for it
+    explicitly and "asyncio" forces the standard loop. Falls back to the
+    standard loop when uvloop is missing. Returns the active implementation.
+    """
+    name = (name or "auto").lower()
+    if name not in LOOP_CHOICES:
+        raise ValueError(f"unknown event loop {name!r}, expected one of {', '.join(LOOP_CHOICES)}")
+    if name != "asyncio" and uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+        return "uvloop"
+    asyncio.set_event_loop_policy(None)
+    return "asyncio"
+
+
+def loop_name(loop=None) -> str:
+    """Short name of the running (or given) loop, e.g. "uvloop" or "asyncio"."""
+    if loop is None:
+        loop = asyncio.get_running_loop()
+    module = type(loop).__module__.split(".", 1)[0]
+    return "asyncio" if module == "asyncio" else module
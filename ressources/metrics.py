@@ -0,0 +1,99 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from aiohttp import web
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+Labels = Optional[Dict[str, Any]]
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{key}="{_escape(value)}"' for key, value in (labels or {}).items()]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+# ========= OPENMETRICS TEXT =========
+class MetricsWriter:
+    """Builds an OpenMetrics text exposition, one metric family at a time."""
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+    def _family(self, name: str, kind: str, help_text: str):
+        self.lines.append(f"# TYPE {name} {kind}")
+        self.lines.append(f"# HELP {name} {_escape(help_text)}")
+
+    def counter(self, name: str, help_text: str, samples: Iterable[Tuple[Labels, float]]):
+        self._family(name, "counter", help_text)
+        for labels, value in samples:
+            self.lines.append(f"{name}_total{_labels(labels)} {_number(value)}")
+
+    def gauge(self, name: str, help_text: str, samples: Iterable[Tuple[Labels, float]]):
+        self._family(name, "gauge", help_text)
+        for labels, value in samples:
+            self.lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+    def histogram(self, name: str, help_text: str, samples: Iterable[Tuple[Labels, Any]]):
+        """`samples` are (labels, LatencyHistogram) pairs"""
+        self._family(name, "histogram", help_text)
+        for labels, hist in samples:
+            for bound, count in hist.cumulative_buckets():
+                le = 'le="%.6g"' % bound
+                self.lines.append(f"{name}_bucket{_labels(labels, le)} {count}")
+            le = 'le="+Inf"'
+            self.lines.append(f"{name}_bucket{_labels(labels, le)} {hist.count}")
+            self.lines.append(f"{name}_count{_labels(labels)} {hist.count}")
+            self.lines.append(f"{name}_sum{_labels(labels)} {_number(hist.sum)}")
+
+    def text(self) -> str:
+        return "\n".join(self.lines) + "\n# EOF\n"
+
+
+# ========= HTTP ENDPOINT =========
+class MetricsServer:
+    """
+    Small aiohttp server exposing `collect()` (returning OpenMetrics text)
+    on /metrics. Runs inside the scanner's event loop.
+    """
+
+    def __init__(self, host: str, port: int, collect: Callable[[], str]):
+        self.host = host
+        self.port = port
+        self.collect = collect
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _metrics(self, request: web.Request) -> web.Response:
+        try:
+            body = self.collect()
+        except Exception as e:
+            return web.Response(status=500, text=f"metrics collection failed: {e}\n")
+        return web.Response(body=body.encode("utf-8"), headers={"Content-Type": CONTENT_TYPE})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self._metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        try:
+            await web.TCPSite(self._runner, self.host, self.port).start()
+        except Exception:
+            await self._runner.cleanup()
+            self._runner = None
+            raise
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
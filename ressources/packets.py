@@ -0,0 +1,66 @@
+import struct
+from functools import lru_cache
+
+# Minecraft Server List Ping (SLP) packets
+PROTOCOL_VERSION = 754
+NEXT_STATE_STATUS = 1
+STATUS_REQUEST = b"\x01\x00"  # packet length 1, packet id 0x00
+
+# Single-byte varints cover packet ids, host lengths and most packet lengths
+_SMALL_VARINTS = [bytes((i,)) for i in range(128)]
+
+
+# ========= VARINT =========
+def encode_varint(v):
+    if 0 <= v < 128:
+        return _SMALL_VARINTS[v]
+    out = bytearray()
+    while True:
+        b = v & 0x7F
+        v >>= 7
+        out.append(b | (0x80 if v else 0))
+        if not v:
+            return bytes(out)
+
+
+# ========= HANDSHAKE TEMPLATES =========
+class HandshakeTemplate:
+    """
+    Precomputed handshake + status request for one port.
+    Everything except the host string is encoded once, so building a
+    packet is one join of cached byte strings.
+    """
+
+    __slots__ = ("port", "prefix", "suffix")
+
+    def __init__(self, port: int, protocol_version: int = PROTOCOL_VERSION):
+        self.port = port
+        # packet id 0x00 + protocol version
+        self.prefix = encode_varint(0) + encode_varint(protocol_version)
+        # port + next state
+        self.suffix = struct.pack(">H", port) + encode_varint(NEXT_STATE_STATUS)
+
+    def build(self, host: str) -> bytes:
+        """Return the length-prefixed handshake followed by the status request"""
+        host_bytes = host.encode()
+        host_length = encode_varint(len(host_bytes))
+        body_length = len(self.prefix) + len(host_length) + len(host_bytes) + len(self.suffix)
+        return b"".join((
+            encode_varint(body_length),
+            self.prefix,
+            host_length,
+            host_bytes,
+            self.suffix,
+            STATUS_REQUEST,
+        ))
+
+
+@lru_cache(maxsize=None)
+def handshake_template(port: int) -> HandshakeTemplate:
+    """Get the cached handshake template for `port`"""
+    return HandshakeTemplate(port)
+
+
+def build_status_request(host: str, port: int) -> bytes:
+    """Build the handshake and status request packets for `host`:`port`"""
+    return handshake_template(port).build(host)
@@ -0,0 +1,153 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+Frame = Tuple[str, str, int]  # (function, file, first line)
+
+# Leaf frames of a thread that is blocked, not running: the event loop in
+# select(), Event/Condition waits (queue.get, the watchdog), an idle
+# executor worker, Tk's mainloop, accept() and asyncio.run() under uvloop.
+IDLE_FRAMES = {
+    ("select", "selectors.py"),
+    ("wait", "threading.py"),
+    ("_worker", "thread.py"),
+    ("mainloop", "__init__.py"),
+    ("accept", "socket.py"),
+    ("run", "runners.py"),
+}
+
+
+def _frame_key(frame) -> Frame:
+    code = frame.f_code
+    return code.co_name, os.path.basename(code.co_filename), code.co_firstlineno
+
+
+def _frame_label(key: Frame) -> str:
+    name, filename, line = key
+    return f"{name} ({filename}:{line})"
+
+
+# ========= SAMPLING PROFILER =========
+class SamplingProfiler:
+    """
+    In-process sampling profiler that can be switched on in a running scanner.
+
+    A background thread reads the stack of the main thread (the one running
+    the event loop), or of all other threads with `all_threads`, every
+    `interval` seconds for a fixed window. Samples whose leaf frame is a
+    blocking wait (IDLE_FRAMES) are counted as idle and left out, so the
+    result shows where CPU time goes, not where threads sleep.
+    The result is written to `output_dir` as a collapsed-stack file
+    ("thread;outer;...;inner count" lines, the input format of
+    flamegraph.pl / speedscope) and a text summary of the top functions.
+    """
+
+    def __init__(self, output_dir: str = "profiles", interval: float = 0.005, all_threads: bool = False):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.all_threads = all_threads
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float, on_done: Optional[Callable[[str, str], None]] = None,
+              label: str = "") -> bool:
+        """
+        Profile for `seconds` in the background. Returns False if a profile
+        is already running. `on_done(summary_path, summary_text)` is called
+        from the profiler thread when the files are written.
+        """
+        if self.running:
+            return False
+        self._thread = threading.Thread(target=self._run, args=(seconds, on_done, label),
+                                        name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return True
+
+    def _run(self, seconds, on_done, label):
+        stacks: Counter = Counter()
+        own_id = threading.get_ident()
+        main_id = threading.main_thread().ident
+        next_sample = time.monotonic()
+        deadline = next_sample + seconds
+        samples = idle = 0
+        while next_sample < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or not (self.all_threads or thread_id == main_id):
+                    continue
+                if (frame.f_code.co_name, os.path.basename(frame.f_code.co_filename)) in IDLE_FRAMES:
+                    idle += 1
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_key(frame))
+                    frame = frame.f_back
+                stack.reverse()
+                stacks[(names.get(thread_id, str(thread_id)),) + tuple(stack)] += 1
+            samples += 1
+            next_sample += self.interval
+            time.sleep(max(0.0, next_sample - time.monotonic()))
+
+        try:
+            summary_path, summary = self._write(stacks, samples, idle, seconds, label)
+        except Exception as e:
+            summary_path, summary = "", f"[PROFILE] Failed to write profile: {e}"
+        if on_done is not None:
+            on_done(summary_path, summary)
+
+    def _write(self, stacks: Counter, samples: int, idle: int, seconds: float, label: str) -> Tuple[str, str]:
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        base = os.path.join(self.output_dir, f"profile-{stamp}-{label or os.getpid()}")
+
+        with open(base + ".folded", "w", encoding="utf-8") as f:
+            for stack, count in stacks.most_common():
+                thread, frames = stack[0], stack[1:]
+                f.write(";".join([thread.replace(";", ":")] + [_frame_label(k) for k in frames]))
+                f.write(f" {count}\n")
+
+        summary = format_summary(stacks, samples, seconds, base + ".folded", idle=idle)
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(summary)
+        return base + ".txt", summary
+
+
+def format_summary(stacks: Counter, samples: int, seconds: float, folded_path: str, top: int = 25,
+                   idle: int = 0) -> str:
+    """Top functions by own (self) and inclusive samples, plus samples per thread"""
+    own: Counter = Counter()
+    inclusive: Counter = Counter()
+    threads: Counter = Counter()
+    total = sum(stacks.values()) or 1
+    for stack, count in stacks.items():
+        threads[stack[0]] += count
+        frames = stack[1:]
+        if frames:
+            own[frames[-1]] += count
+        for key in set(frames):
+            inclusive[key] += count
+
+    lines: List[str] = [
+        f"Sampling profile: {seconds:.0f}s, {samples} samples, {sum(stacks.values())} busy thread stacks "
+        f"({idle} idle stacks left out)",
+        f"Collapsed stacks: {folded_path}",
+        "",
+        "Samples per thread:",
+    ]
+    lines += [f"  {count / total:6.1%}  {thread}" for thread, count in threads.most_common()]
+
+    def table(title: str, counter: Dict[Frame, int]):
+        lines.append("")
+        lines.append(title)
+        for key, count in counter.most_common(top):
+            lines.append(f"  {count / total:6.1%}  {count:>7}  {_frame_label(key)}")
+
+    table(f"Top {top} functions (self):", own)
+    table(f"Top {top} functions (inclusive):", inclusive)
+    return "\n".join(lines) + "\n"
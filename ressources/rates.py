@@ -0,0 +1,116 @@
+import threading
+import time
+from typing import List
+
+
+# ========= RATE COUNTER =========
+class RateCounter:
+    """
+    Event counter with per-second resolution over the last `seconds` seconds.
+
+    A ring buffer stores the running total at the start of every second, so
+    add() and count(window) are O(1) for any event rate: a window count is
+    the total at the start of the current second minus the total at the
+    window start. add() must only
+    be called from one thread (see ShardedRateCounter), readers can be on
+    any thread and never block it.
+    """
+
+    def __init__(self, seconds: int = 3600, clock=time.monotonic):
+        self.seconds = seconds
+        self.total = 0
+        self._size = seconds + 1
+        self._starts = [0] * self._size  # running total at the start of each second
+        self._clock = clock
+        self._second = int(clock())
+
+    def add(self, n: int = 1):
+        second = int(self._clock())
+        if second != self._second:
+            self._advance(second)
+        self.total += n
+
+    def _advance(self, second: int):
+        last = self._second
+        if second <= last:
+            return
+        total = self.total
+        size = self._size
+        # Seconds without events start with the same total; at most one
+        # full lap of the ring has to be written
+        for s in range(max(last + 1, second - size + 1), second + 1):
+            self._starts[s % size] = total
+        self._second = second
+
+    def _total_at(self, second: int) -> int:
+        """Running total at the start of `second` (must be within the ring)"""
+        if second > self._second:
+            return self.total
+        return self._starts[second % self._size]
+
+    def count(self, window: int = 60) -> int:
+        """Events in the last `window` complete seconds (the current, still
+        running second is left out so the count always spans `window` seconds)"""
+        window = max(1, min(window, self.seconds))
+        now = int(self._clock())
+        return self._total_at(now) - self._total_at(now - window)
+
+    def rate(self, window: int = 60) -> float:
+        """Average events per second over the last `window` complete seconds"""
+        window = max(1, min(window, self.seconds))
+        return self.count(window) / window
+
+    def per_second(self, seconds: int = 10) -> List[int]:
+        """Events in each of the last `seconds` complete seconds, oldest first"""
+        seconds = max(1, min(seconds, self.seconds - 1))
+        now = int(self._clock())
+        starts = [self._total_at(s) for s in range(now - seconds, now + 1)]
+        return [b - a for a, b in zip(starts, starts[1:])]
+
+
+class ShardedRateCounter:
+    """
+    RateCounter for several writer threads without locking on add():
+    every thread writes to its own RateCounter shard, queries add up all
+    shards.
+    """
+
+    def __init__(self, seconds: int = 3600, clock=time.monotonic):
+        self.seconds = seconds
+        self._clock = clock
+        self._local = threading.local()
+        self._shards: List[RateCounter] = []
+        self._register = threading.Lock()
+
+    def _new_shard(self) -> RateCounter:
+        shard = RateCounter(self.seconds, self._clock)
+        with self._register:
+            self._shards.append(shard)
+        self._local.shard = shard
+        return shard
+
+    def add(self, n: int = 1):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard.add(n)
+
+    @property
+    def total(self) -> int:
+        return sum(shard.total for shard in list(self._shards))
+
+    def count(self, window: int = 60) -> int:
+        return sum(shard.count(window) for shard in list(self._shards))
+
+    def rate(self, window: int = 60) -> float:
+        window = max(1, min(window, self.seconds))
+        return self.count(window) / window
+
+    def per_second(self, seconds: int = 10) -> List[int]:
+        seconds = max(1, min(seconds, self.seconds - 1))
+        totals = [0] * seconds
+        for shard in list(self._shards):
+            for i, value in enumerate(shard.per_second(seconds)):
+                totals[i] += value
+        return totals
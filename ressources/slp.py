@@ -0,0 +1,224 @@
+import asyncio
+import errno
+import json
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from ressources.packets import build_status_request
+from ressources.sockets import close_fast
+
+# Status responses with a favicon are tens of KB, modded servers can send
+# long mod lists. Anything larger is treated as garbage.
+MAX_FRAME_SIZE = 1024 * 1024
+READ_CHUNK_SIZE = 16 * 1024
+
+# Connect outcomes
+OPEN = "open"
+TIMEOUT = "timeout"
+REFUSED = "refused"
+UNREACHABLE = "unreachable"
+LOCAL_ERROR = "local_error"  # our side ran out of fds, ports or buffers
+
+LOCAL_ERRNOS = {
+    getattr(errno, name) for name in (
+        "EMFILE", "ENFILE", "EADDRNOTAVAIL", "EADDRINUSE", "ENOBUFS", "ENOMEM",
+        "WSAEMFILE", "WSAEADDRNOTAVAIL", "WSAEADDRINUSE", "WSAENOBUFS",
+    ) if hasattr(errno, name)
+}
+
+
+# ========= VARINT =========
+def decode_varint(buf, pos: int = 0) -> Optional[Tuple[int, int]]:
+    """
+    Decode a varint from `buf` starting at `pos`.
+    Returns (value, next_pos) or None if the buffer ends before the varint does.
+    Raises ValueError for varints longer than 5 bytes.
+    """
+    num = 0
+    for i in range(5):
+        if pos + i >= len(buf):
+            return None
+        b = buf[pos + i]
+        num |= (b & 0x7F) << (7 * i)
+        if not b & 0x80:
+            return num, pos + i + 1
+    raise ValueError("VarInt is too big")
+
+
+def status_text(payload) -> Optional[str]:
+    """
+    JSON text of a status response packet (payload without the length
+    prefix), None if the payload is not a complete status response.
+    """
+    header = decode_varint(payload)
+    if header is None or header[0] != 0x00:  # status response packet id
+        return None
+    string_header = decode_varint(payload, header[1])
+    if string_header is None:
+        return None
+    length, start = string_header
+    if not length or start + length > len(payload):
+        return None
+    return str(payload[start:start + length], "utf-8")
+
+
+# ========= FRAME READER =========
+class FrameTooLarge(ValueError):
+    """Raised when a peer announces a packet larger than the allowed maximum"""
+
+
+class FrameReader:
+    """
+    Buffered reader for length-prefixed packets.
+    Reads the stream in large chunks into one bytearray that is compacted
+    in place and reused for every frame of the connection, handles frames
+    split over several reads, and rejects announced lengths above
+    `max_frame_size` before any of the payload is buffered.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, max_frame_size: int = MAX_FRAME_SIZE):
+        self.reader = reader
+        self.max_frame_size = max_frame_size
+        self.buffer = bytearray()
+        self._consumed = 0
+
+    async def read_frame(self) -> Optional[memoryview]:
+        """
+        Return the payload (packet id + data) of the next packet, or None on EOF.
+        The returned view must be released before the next call.
+        """
+        if self._consumed:
+            del self.buffer[:self._consumed]
+            self._consumed = 0
+
+        while True:
+            header = decode_varint(self.buffer)
+            if header is not None:
+                length, start = header
+                if length > self.max_frame_size:
+                    raise FrameTooLarge(f"frame of {length} bytes exceeds {self.max_frame_size}")
+                end = start + length
+                if len(self.buffer) >= end:
+                    self._consumed = end
+                    return memoryview(self.buffer)[start:end]
+
+            if not await self.fill():
+                return None
+
+    async def fill(self) -> bool:
+        """Read one chunk into the buffer. Returns False on EOF."""
+        chunk = await self.reader.read(READ_CHUNK_SIZE)
+        if not chunk:
+            return False
+        self.buffer += chunk
+        return True
+
+
+# ========= STATUS QUERY =========
+Connection = Tuple[asyncio.StreamReader, asyncio.StreamWriter]
+
+
+async def connect(ip: str, port: int, timeout: float) -> Tuple[Optional[Connection], str]:
+    """
+    Cheap first stage: only check whether the TCP port accepts connections.
+    Returns the open (reader, writer) pair so the handshake can reuse it
+    (None if the connect failed) and the outcome: OPEN, TIMEOUT, REFUSED,
+    UNREACHABLE or LOCAL_ERROR.
+    """
+    try:
+        return await asyncio.wait_for(asyncio.open_connection(ip, port), timeout), OPEN
+    except asyncio.CancelledError:
+        raise
+    except asyncio.TimeoutError:
+        return None, TIMEOUT
+    except ConnectionRefusedError:
+        return None, REFUSED
+    except OSError as e:
+        return None, LOCAL_ERROR if e.errno in LOCAL_ERRNOS else UNREACHABLE
+    except Exception:
+        return None, UNREACHABLE
+
+
+async def open_port(ip: str, port: int, timeout: float) -> Optional[Connection]:
+    """Like connect(), without the outcome."""
+    return (await connect(ip, port, timeout))[0]
+
+
+async def _read_status(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                       host: str, port: int, first_byte_timeout: Optional[float],
+                       timings: Optional[Dict[str, float]]) -> Optional[Dict[str, Any]]:
+    writer.write(build_status_request(host, port))
+    await writer.drain()
+    sent = time.perf_counter()
+
+    frames = FrameReader(reader)
+    if first_byte_timeout is None:
+        answered = await frames.fill()
+    else:
+        # Peers that accept but never answer are dropped early
+        answered = await asyncio.wait_for(frames.fill(), first_byte_timeout)
+    if not answered:
+        return None
+    if timings is not None:
+        timings["first_byte"] = time.perf_counter() - sent
+    frame = await frames.read_frame()
+    if frame is None:
+        return None
+
+    with frame:
+        text = status_text(frame)
+    if text is None:
+        return None
+
+    if timings is None:
+        return json.loads(text)
+    parse_start = time.perf_counter()
+    status = json.loads(text)
+    timings["json_parse"] = time.perf_counter() - parse_start
+    return status
+
+
+async def query_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                           host: str, port: int, timeout: float,
+                           first_byte_timeout: Optional[float] = None,
+                           timings: Optional[Dict[str, float]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Second stage: run the SLP handshake on an already open connection.
+    `timeout` bounds the whole response, `first_byte_timeout` (if set) the
+    wait for the first byte of it. If `timings` is given, the time to the
+    first byte and the JSON parse time are stored in it ("first_byte",
+    "json_parse"). The connection is always closed afterwards, without
+    leaving the local port in TIME_WAIT.
+    """
+    try:
+        return await asyncio.wait_for(
+            _read_status(reader, writer, host, port, first_byte_timeout, timings), timeout)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        return None
+    finally:
+        close_fast(writer)
+
+
+async def query_status(ip: str, port: int, timeout: float, connect_timeout: Optional[float] = None,
+                       first_byte_timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """
+    Query a server's status JSON without blocking the event loop.
+    The connect gets `connect_timeout` (default: `timeout`), the response
+    `timeout` and its first byte `first_byte_timeout`.
+    Returns the decoded status dict or None if the server did not answer.
+    """
+    connection = await open_port(ip, port, timeout if connect_timeout is None else connect_timeout)
+    if connection is None:
+        return None
+    return await query_connection(*connection, ip, port, timeout, first_byte_timeout)
+
+
+def query_status_sync(ip: str, port: int, timeout: float, connect_timeout: Optional[float] = None,
+                      first_byte_timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+    """Blocking wrapper around query_status for threads without an event loop (GUI)"""
+    try:
+        return asyncio.run(query_status(ip, port, timeout, connect_timeout, first_byte_timeout))
+    except Exception:
+        return None
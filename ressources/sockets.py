@@ -0,0 +1,152 @@
+import os
+import socket
+import struct
+from typing import Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# l_onoff = 1, l_linger = 0: close() sends RST and skips TIME_WAIT
+_LINGER_ABORT = struct.pack("ii", 1, 0)
+
+
+# ========= LIMITS =========
+def raise_fd_limit(target: Optional[int] = None) -> Tuple[Optional[int], Optional[int]]:
+    """
+    Raise the soft RLIMIT_NOFILE towards the hard limit (or `target`).
+    Returns the (soft, hard) limits now in effect, (None, None) if unknown.
+    """
+    if resource is None:
+        return None, None
+    try:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        wanted = hard if target is None else target
+        if hard != resource.RLIM_INFINITY:
+            wanted = min(wanted, hard)
+        if wanted == resource.RLIM_INFINITY:
+            # Some kernels refuse "unlimited" even though the hard limit allows it
+            wanted = 1024 * 1024
+        if soft == resource.RLIM_INFINITY or wanted <= soft:
+            return soft, hard
+        resource.setrlimit(resource.RLIMIT_NOFILE, (wanted, hard))
+        return resource.getrlimit(resource.RLIMIT_NOFILE)
+    except (OSError, ValueError):
+        try:
+            return resource.getrlimit(resource.RLIMIT_NOFILE)
+        except (OSError, ValueError):
+            return None, None
+
+
+def open_fds() -> Optional[int]:
+    """
+    Number of file descriptors this process has open, None if unknown.
+    Lists /proc/self/fd, which takes milliseconds with many sockets open:
+    do not call it on the event loop.
+    """
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+def ephemeral_port_count() -> Optional[int]:
+    """Size of the local port range used for outgoing connections, None if unknown"""
+    try:
+        with open("/proc/sys/net/ipv4/ip_local_port_range", "r") as f:
+            low, high = map(int, f.read().split())
+        return high - low + 1
+    except (OSError, ValueError):
+        return None
+
+
+def count_time_wait() -> Optional[int]:
+    """
+    Number of TCP sockets (IPv4 and IPv6) in TIME_WAIT, None if unknown.
+    This is the kernel's counter for the whole host (network namespace),
+    not for this process: other programs and scanner instances count too.
+    Read from /proc/net/sockstat, one short line instead of the whole
+    socket table in /proc/net/tcp.
+    """
+    try:
+        with open("/proc/net/sockstat", "r") as f:
+            for line in f:
+                if line.startswith("TCP:"):
+                    fields = line.split()
+                    return int(fields[fields.index("tw") + 1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+# ========= CLOSING =========
+def close_fast(writer):
+    """
+    Close a probe connection without leaving the local port in TIME_WAIT
+    (SO_LINGER 0). Only for connections whose data has been read already.
+    """
+    sock = writer.get_extra_info("socket")
+    if sock is not None:
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, _LINGER_ABORT)
+        except (OSError, AttributeError):
+            pass
+    writer.close()
+
+
+# ========= BUDGET =========
+class SocketBudget:
+    """
+    File descriptor and ephemeral port budget of the scanner process.
+    Raises the soft fd limit once on creation, reports how many probe
+    sockets fit next to `reserve` fds for files, the database and the GUI,
+    and counts local resource failures (out of fds, ports or buffers)
+    separately from real misses. refresh() re-reads the open fd and
+    TIME_WAIT counts; it reads /proc, so run it in an executor, the
+    other methods only use the values of the last refresh().
+    """
+
+    def __init__(self, reserve: int = 128):
+        self.reserve = reserve
+        self.fd_soft, self.fd_hard = raise_fd_limit()
+        self.port_range = ephemeral_port_count()
+        self.open_fds = open_fds()
+        self.time_wait = count_time_wait()
+        self.local_failures = 0
+
+    def max_sockets(self) -> Optional[int]:
+        """Upper bound for sockets open at the same time, None if unknown"""
+        limits = []
+        if self.fd_soft is not None and resource is not None and self.fd_soft != resource.RLIM_INFINITY:
+            limits.append(self.fd_soft - self.reserve)
+        if self.port_range is not None:
+            limits.append(self.port_range)
+        return max(1, min(limits)) if limits else None
+
+    def free_fds(self) -> Optional[int]:
+        """File descriptors left below the soft limit (as of the last refresh())"""
+        if self.fd_soft is None or resource is None or self.fd_soft == resource.RLIM_INFINITY:
+            return None
+        return None if self.open_fds is None else self.fd_soft - self.open_fds
+
+    def free_ports(self) -> Optional[int]:
+        """Local ports not held by TIME_WAIT sockets (as of the last refresh())"""
+        if self.port_range is None or self.time_wait is None:
+            return None
+        return self.port_range - self.time_wait
+
+    def refresh(self):
+        self.open_fds = open_fds()
+        self.time_wait = count_time_wait()
+
+    def count_failure(self):
+        self.local_failures += 1
+
+    def status(self) -> str:
+        """Short text for the GUI"""
+        def text(value):
+            return "?" if value is None else str(value)
+        return (f"fds free {text(self.free_fds())}/{text(self.fd_soft)}  "
+                f"TIME_WAIT {text(self.time_wait)}/{text(self.port_range)}  "
+                f"local errors {self.local_failures}")
@@ -0,0 +1,327 @@
+import random
+import socket
+import struct
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# ========= RESERVED RANGES =========
+# Same bogon rules as random_ip(), expressed as (first /16, last /16) spans
+RESERVED_SLASH16 = [
+    (0x0000, 0x00FF),  # 0.0.0.0/8
+    (0x0A00, 0x0AFF),  # 10.0.0.0/8
+    (0x6440, 0x647F),  # 100.64.0.0/10
+    (0x7F00, 0x7FFF),  # 127.0.0.0/8
+    (0xA9FE, 0xA9FE),  # 169.254.0.0/16
+    (0xAC10, 0xAC1F),  # 172.16.0.0/12
+    (0xC0A8, 0xC0A8),  # 192.168.0.0/16
+    (0xE000, 0xFFFF),  # 224.0.0.0/3 (multicast + reserved)
+]
+
+
+def _build_allowed_table() -> bytearray:
+    """One byte per /16: 1 if random addresses may be drawn from it"""
+    table = bytearray(b"\x01" * 65536)
+    for first, last in RESERVED_SLASH16:
+        table[first:last + 1] = b"\x00" * (last - first + 1)
+    return table
+
+
+ALLOWED_SLASH16 = _build_allowed_table()
+
+
+# ========= BATCH GENERATOR =========
+class BatchIPGenerator:
+    """
+    Generates random scan targets in batches.
+    With probability `asn_prob` an address is drawn from one of the
+    `asn_ranges` (like random_from_cidr()), otherwise uniformly from the
+    public IPv4 space with reserved /16s rejected through a lookup table and
+    .0/.255 host bytes skipped (like random_ip()). Uses NumPy when it is
+    installed and falls back to a pure Python loop otherwise.
+    Addresses in `exclusions` (an ExclusionList) are dropped from the batch.
+    """
+
+    def __init__(self, asn_ranges: Sequence[Tuple[str, int]], asn_prob: float,
+                 expand_bits: int = 0, seed: Optional[int] = None, exclusions=None):
+        self.asn_prob = asn_prob
+        self.exclusions = exclusions
+        bases = []
+        spans = []
+        for base, mask in asn_ranges:
+            new_mask = max(8, mask - expand_bits)
+            bases.append(struct.unpack("!I", socket.inet_aton(base))[0])
+            spans.append(1 << (32 - new_mask))
+        self.bases = bases
+        self.spans = spans
+
+        if np is not None:
+            self._rng = np.random.default_rng(seed)
+            self._np_bases = np.array(bases, dtype=np.uint64)
+            self._np_spans = np.array(spans, dtype=np.uint64)
+            self._np_allowed = np.frombuffer(bytes(ALLOWED_SLASH16), dtype=np.uint8).astype(bool)
+        else:
+            self._random = random.Random(seed)
+
+    def next_batch(self, size: int) -> List[str]:
+        """Return `size` random target addresses as dotted strings, minus excluded ones"""
+        if np is not None:
+            return self._batch_numpy(size)
+        return self._batch_python(size)
+
+    def _batch_numpy(self, size: int) -> List[str]:
+        rng = self._rng
+        out = np.empty(size, dtype=np.uint32)
+
+        use_asn = rng.random(size) < self.asn_prob if self.bases else np.zeros(size, dtype=bool)
+        asn_count = int(use_asn.sum())
+        if asn_count:
+            idx = rng.integers(0, len(self.bases), asn_count)
+            spans = self._np_spans[idx]
+            offsets = rng.integers(1, spans - 1, dtype=np.uint64)
+            out[use_asn] = ((self._np_bases[idx] + offsets) & 0xFFFFFFFF).astype(np.uint32)
+
+        missing = size - asn_count
+        if missing:
+            randoms = np.empty(0, dtype=np.uint32)
+            while len(randoms) < missing:
+                # Oversample a little so one round usually suffices
+                candidates = rng.integers(0, 1 << 32, int(missing * 1.3) + 16, dtype=np.uint32)
+                low = candidates & 0xFF
+                keep = self._np_allowed[candidates >> 16] & (low != 0) & (low != 255)
+                randoms = np.concatenate((randoms, candidates[keep]))
+            out[~use_asn] = randoms[:missing]
+
+        if self.exclusions:
+            out = out[~self.exclusions.mask_array(out)]
+
+        packed = out.astype(">u4").tobytes()
+        ntoa = socket.inet_ntoa
+        return [ntoa(packed[i:i + 4]) for i in range(0, len(packed), 4)]
+
+    def _batch_python(self, size: int) -> List[str]:
+        rnd = self._random
+        getrandbits = rnd.getrandbits
+        allowed = ALLOWED_SLASH16
+        bases = self.bases
+        spans = self.spans
+        asn_prob = self.asn_prob if bases else 0.0
+        ntoa = socket.inet_ntoa
+        pack = struct.Struct("!I").pack
+        excluded = self.exclusions.contains_int if self.exclusions else None
+
+        out = []
+        append = out.append
+        for _ in range(size):
+            if rnd.random() < asn_prob:
+                i = rnd.randrange(len(bases))
+                ip = (bases[i] + rnd.randint(1, spans[i] - 2)) & 0xFFFFFFFF
+            else:
+                while True:
+                    ip = getrandbits(32)
+                    low = ip & 0xFF
+                    if allowed[ip >> 16] and low != 0 and low != 255:
+                        break
+            if excluded and excluded(ip):
+                continue
+            append(ntoa(pack(ip)))
+        return out
+
+
+# ========= ADDRESS PERMUTATION =========
+def _is_prime(n: int) -> bool:
+    """Deterministic Miller-Rabin for n < 3.3e24"""
+    if n < 2:
+        return False
+    small = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+    for p in small:
+        if n % p == 0:
+            return n == p
+    d, r = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        r += 1
+    for a in small:
+        x = pow(a, d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(r - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def _prime_factors(n: int) -> List[int]:
+    factors = []
+    f = 2
+    while f * f <= n:
+        if n % f == 0:
+            factors.append(f)
+            while n % f == 0:
+                n //= f
+        f += 1 if f == 2 else 2
+    if n > 1:
+        factors.append(n)
+    return factors
+
+
+def _merge_ranges(cidrs: Sequence[Tuple[str, int]]) -> List[Tuple[int, int]]:
+    """Turn (base, mask) pairs into sorted, non-overlapping [start, end) intervals"""
+    intervals = []
+    for base, mask in cidrs:
+        size = 1 << (32 - mask)
+        start = struct.unpack("!I", socket.inet_aton(base))[0] & ~(size - 1) & 0xFFFFFFFF
+        intervals.append((start, start + size))
+    intervals.sort()
+    merged = []
+    for start, end in intervals:
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class AddressPermutation:
+    """
+    Visits every address of the IPv4 space (or of a CIDR set) exactly once
+    in a pseudo-random order.
+
+    Walks the multiplicative group modulo a prime p > N: x -> x * g mod p
+    with a primitive root g, so positions 1..p-1 form one full cycle and
+    values above N are skipped. The order is fixed by `seed`. Shard i of n
+    takes cycle positions i, i+n, i+2n, ... so shards are disjoint and
+    together cover the whole space. The position is a few integers, see
+    state()/from_state() for checkpointing.
+
+    In full-space mode reserved /16s and .0/.255 host bytes are skipped
+    like in random_ip(). Addresses in `exclusions` (an ExclusionList) are
+    skipped as well.
+    """
+
+    def __init__(self, cidrs: Optional[Sequence[Tuple[str, int]]] = None, seed: int = 0,
+                 shard: int = 0, shards: int = 1, exclusions=None):
+        if not 0 <= shard < shards:
+            raise ValueError(f"invalid shard {shard}/{shards}")
+        self.seed = seed
+        self.shard = shard
+        self.shards = shards
+        self.exclusions = exclusions
+
+        if cidrs:
+            self.intervals = _merge_ranges(cidrs)
+            self.filter_reserved = False
+        else:
+            self.intervals = [(0, 1 << 32)]
+            self.filter_reserved = True
+        self._offsets = []
+        total = 0
+        for start, end in self.intervals:
+            self._offsets.append(total)
+            total += end - start
+        self.size = total
+
+        # Smallest prime above the domain and a seeded primitive root
+        p = self.size + 1
+        while not _is_prime(p):
+            p += 1
+        self.prime = p
+        factors = _prime_factors(p - 1)
+        rnd = random.Random(seed)
+        while True:
+            g = rnd.randrange(2, p) if p > 3 else 2
+            if all(pow(g, (p - 1) // q, p) != 1 for q in factors):
+                break
+        self.generator = g
+        self.first = rnd.randrange(1, p)
+
+        # Shard i starts at cycle position i and steps n positions at a time
+        self.step = pow(g, shards, p)
+        self.total_steps = (p - 1 - shard + shards - 1) // shards
+        self.current = self.first * pow(g, shard, p) % p
+        self.steps = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        ip = self.next_int()
+        if ip is None:
+            raise StopIteration
+        return socket.inet_ntoa(struct.pack("!I", ip))
+
+    def next_int(self) -> Optional[int]:
+        """Return the next address as an integer, or None once the shard is exhausted"""
+        p = self.prime
+        size = self.size
+        allowed = ALLOWED_SLASH16
+        excluded = self.exclusions.contains_int if self.exclusions else None
+        while self.steps < self.total_steps:
+            value = self.current - 1
+            self.current = self.current * self.step % p
+            self.steps += 1
+            if value >= size:
+                continue
+            ip = self._index_to_ip(value)
+            if self.filter_reserved:
+                low = ip & 0xFF
+                if not allowed[ip >> 16] or low == 0 or low == 255:
+                    continue
+            if excluded and excluded(ip):
+                continue
+            return ip
+        return None
+
+    def next_batch(self, size: int) -> List[str]:
+        """Return up to `size` addresses, fewer only when the shard is exhausted"""
+        ntoa = socket.inet_ntoa
+        pack = struct.Struct("!I").pack
+        out = []
+        for _ in range(size):
+            ip = self.next_int()
+            if ip is None:
+                break
+            out.append(ntoa(pack(ip)))
+        return out
+
+    def _index_to_ip(self, index: int) -> int:
+        if len(self.intervals) == 1:
+            return self.intervals[0][0] + index
+        i = bisect_right(self._offsets, index) - 1
+        return self.intervals[i][0] + index - self._offsets[i]
+
+    @property
+    def progress(self) -> float:
+        """Fraction of this shard that has been visited (0.0 - 1.0)"""
+        return self.steps / self.total_steps if self.total_steps else 1.0
+
+    def state(self) -> Dict[str, int]:
+        """Small checkpoint blob, restore with from_state()"""
+        return {
+            "seed": self.seed,
+            "shard": self.shard,
+            "shards": self.shards,
+            "size": self.size,
+            "current": self.current,
+            "steps": self.steps,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, int], cidrs: Optional[Sequence[Tuple[str, int]]] = None,
+                   exclusions=None) -> "AddressPermutation":
+        """Resume a permutation from state(). `cidrs` must match the original ones."""
+        perm = cls(cidrs, seed=state["seed"], shard=state["shard"], shards=state["shards"],
+                   exclusions=exclusions)
+        if state["size"] != perm.size:
+            raise ValueError("checkpoint was created for a different address set")
+        perm.current = state["current"]
+        perm.steps = state["steps"]
+        return perm
@@ -0,0 +1,105 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from ressources.histograms import LatencyHistogram, format_percentiles
+
+
+# ========= EVENT LOOP WATCHDOG =========
+class LoopWatchdog:
+    """
+    Measures event loop scheduling lag and default executor saturation.
+
+    A heartbeat task sleeps `interval` seconds and records how late it
+    wakes up. A separate monitor thread watches the heartbeat: when the
+    loop has not come back for `threshold` seconds it samples the stack of
+    the loop thread while it is still blocked (at most once per stall and
+    every `cooldown` seconds) and passes it to `log`.
+    The loop's default executor is replaced with an own ThreadPoolExecutor
+    so its queue depth and thread count can be reported.
+    """
+
+    def __init__(self, interval: float = 0.1, threshold: float = 0.25, cooldown: float = 30.0,
+                 executor_workers: Optional[int] = None, log: Callable[[str], None] = print):
+        self.interval = interval
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.log = log
+        self.executor = ThreadPoolExecutor(max_workers=executor_workers, thread_name_prefix="loop-executor")
+
+        self.lag = 0.0
+        self.max_lag = 0.0  # since the last status() call
+        self.histogram = LatencyHistogram()
+        self.stalls = 0
+        self._beat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._last_sample = 0.0
+        self._sampled_beat = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start on the running loop (call from inside it)."""
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(self.executor)
+        self._loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.create_task(self._heartbeat())
+        threading.Thread(target=self._monitor, name="loop-watchdog", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _heartbeat(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - start - self.interval)
+            self._beat = now
+            self.lag = lag
+            if lag > self.max_lag:
+                self.max_lag = lag
+            self.histogram.record(lag)
+
+    def _monitor(self):
+        while not self._stop.wait(self.interval / 2):
+            beat = self._beat
+            blocked = time.monotonic() - beat - self.interval
+            if blocked < self.threshold or beat == self._sampled_beat:
+                continue
+            self._sampled_beat = beat
+            self.stalls += 1
+            now = time.monotonic()
+            if now - self._last_sample < self.cooldown:
+                continue
+            self._last_sample = now
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else "  (no frame)\n"
+            self.log(f"[WATCHDOG] Event loop blocked for {blocked:.2f}s so far, loop thread stack:\n{stack}")
+
+    # ----- Executor -----
+    def executor_queue(self) -> int:
+        try:
+            return self.executor._work_queue.qsize()
+        except Exception:
+            return 0
+
+    def executor_threads(self) -> int:
+        try:
+            return len(self.executor._threads)
+        except Exception:
+            return 0
+
+    def status(self) -> str:
+        """Short text for the GUI; resets the max lag window"""
+        max_lag, self.max_lag = self.max_lag, 0.0
+        return (f"lag {self.lag * 1000:.1f}ms (max {max_lag * 1000:.0f}ms)  stalls {self.stalls}  "
+                f"executor {self.executor_queue()} queued / {self.executor_threads()} threads\n"
+                f"lag {format_percentiles(self.histogram)}")
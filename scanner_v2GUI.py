@@ -1,11 +1,21 @@
-import asyncio, random, socket, struct, json, aiohttp, os, sys, time, sqlite3, subprocess
+import asyncio, random, json, aiohttp, os, sys, time, sqlite3, subprocess, signal
 from colorama import Fore, Style, init
 import config.config as config
 import threading
 from collections import deque
-from concurrent.futures import ThreadPoolExecutor
-from queue import Queue
 from ressources.instance_manager import get_instance_manager, StatsMessage
+from ressources.slp import LOCAL_ERROR, connect, query_connection, query_status_sync
+from ressources.sockets import SocketBudget, close_fast
+from ressources.concurrency import AdaptiveLimiter
+from ressources.loops import LOOP_CHOICES, install_event_loop
+from ressources.rates import ShardedRateCounter
+from ressources.counters import ShardedCounters
+from ressources.histograms import LatencyHistogram, format_percentiles, merge_histograms
+from ressources.metrics import MetricsServer, MetricsWriter
+from ressources.watchdog import LoopWatchdog
+from ressources.profiler import SamplingProfiler
+from ressources.targets import AddressPermutation, BatchIPGenerator
+from ressources.exclusions import ExclusionList
 from datetime import datetime
 
 
@@ -32,8 +42,6 @@ except Exception:
     tk = None
     ttk = None
 
-executor = ThreadPoolExecutor(max_workers=max(50, config.CONCURRENCY * 2))
-
 http_session: aiohttp.ClientSession | None = None
 
 last_title_update = 0
@@ -50,9 +58,38 @@ logs_text = None
 stats_labels = {}
 recent_box = None
 
-# Thread-safe GUI message queue
-gui_message_queue: Queue = Queue()
-gui_queue_processing = False
+# Scan log records (message, tag) waiting for the Tk thread. deque.append()
+# and popleft() are atomic, so any thread can log without a lock; when the
+# GUI falls behind, the oldest records are dropped.
+GUI_LOG_QUEUE_SIZE = getattr(config, 'GUI_LOG_QUEUE_SIZE', 5000)
+GUI_LOG_INTERVAL = getattr(config, 'GUI_LOG_INTERVAL', 100)  # ms between two drains
+GUI_LOG_LINES_PER_SECOND = getattr(config, 'GUI_LOG_LINES_PER_SECOND', 200)
+gui_message_queue: deque = deque(maxlen=GUI_LOG_QUEUE_SIZE)
+
+# Per-probe noise, dropped first when there are more lines than can be read
+GUI_LOG_BULK_TAGS = ("scan", "none")
+
+# Scan result log lines per category. Callers check the LOG_* flag before
+# formatting the line, so a disabled category costs one global lookup.
+# Headless workers use WORKER_LOG_CATEGORIES (no per-probe misses).
+DEFAULT_LOG_CATEGORIES = {"scan": True, "none": True, "empty": True, "online": True, "webhook": True}
+LOG_CATEGORIES = {**DEFAULT_LOG_CATEGORIES, **getattr(config, 'LOG_CATEGORIES', {})}
+WORKER_LOG_CATEGORIES = {**DEFAULT_LOG_CATEGORIES, "scan": False, "none": False, "empty": False,
+                         **getattr(config, 'WORKER_LOG_CATEGORIES', {})}
+LOG_SCAN = LOG_NONE = LOG_EMPTY = LOG_ONLINE = LOG_WEBHOOK = True
+
+
+def set_log_categories(categories: dict):
+    """Enable/disable the scan, none, empty, online and webhook log lines"""
+    global LOG_SCAN, LOG_NONE, LOG_EMPTY, LOG_ONLINE, LOG_WEBHOOK
+    LOG_SCAN = bool(categories.get("scan", True))
+    LOG_NONE = bool(categories.get("none", True))
+    LOG_EMPTY = bool(categories.get("empty", True))
+    LOG_ONLINE = bool(categories.get("online", True))
+    LOG_WEBHOOK = bool(categories.get("webhook", True))
+
+
+set_log_categories(LOG_CATEGORIES)
 
 # Scanner instance control
 active_scanners = 1
@@ -67,13 +104,6 @@ runs_completed = 0  # Completed runs counter
 # Instance management
 instance_mgr = get_instance_manager()
 is_worker_mode = False  # True if running as worker (no GUI)
-worker_stats_lock = threading.Lock()
-worker_local_stats = {
-    "scanned": 0,
-    "found": 0,
-    "with_players": 0,
-    "sent_count": 0
-}
 
 # Worker callback functions
 def on_worker_stats_received(message):
@@ -91,7 +121,8 @@ def on_server_broadcast(server_key: str):
     # Note: This is called from a thread, so we can't use async with
     # The sent_set is thread-safe for this use case
     sent_set.add(server_key)
-    gui_print(f"[SYNC] Received server update from master: {server_key}", "webhook")
+    if LOG_WEBHOOK:
+        gui_print(f"[SYNC] Received server update from master: {server_key}", "webhook")
 
 
 
@@ -125,7 +156,7 @@ NEON = "#ff4df2"
 
 
 # ========= SENT PERSISTENCE =========
-SENT_FILE = "ressources//sent_servers.txt"
+SENT_FILE = getattr(config, 'SENT_FILE', "ressources//sent_servers.txt")
 sent_set: set = set()
 sent_lock = asyncio.Lock()
 
@@ -189,7 +220,7 @@ async def mark_sent(key: str) -> bool:
 load_sent()
 
 # ========= DATABASE FUNCTIONS =========
-DATABASE_FILE = "ressources//servers.db"
+DATABASE_FILE = getattr(config, 'DATABASE_FILE', "ressources//servers.db")
 
 def init_db():
     """Initialize the database"""
@@ -213,58 +244,127 @@ def init_db():
             )
         ''')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_ip_port ON servers(ip, port)')
+        # Newest-first paging of the server lists (see get_servers_page)
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_scanned_at ON servers(scanned_at)')
         conn.commit()
         conn.close()
     except Exception as e:
         gui_print(f"[DB] Error initializing database: {e}")
 
-def get_servers_from_db(search_query=""):
-    """Get servers from database with optional search
-    
+def server_filter(search_query="", keys=None):
+    """WHERE clause and parameters for a server search
+
     Supports:
     - Text search: searches ip, motd, version, host
     - Number search: searches for exact player count (e.g., "3" finds servers with exactly 3 players)
+    - keys: only servers whose "ip:port" is in this collection (e.g. favorites)
+    """
+    clauses = []
+    params = []
+    if search_query:
+        try:
+            params.append(int(search_query))
+            clauses.append("players_online = ?")
+        except ValueError:
+            search_pattern = f"%{search_query}%"
+            clauses.append("(ip LIKE ? OR motd LIKE ? OR version LIKE ? OR host LIKE ?)")
+            params += [search_pattern] * 4
+    if keys is not None:
+        keys = list(keys)
+        clauses.append(f"ip || ':' || port IN ({', '.join('?' * len(keys))})" if keys else "0")
+        params += keys
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+# Columns needed by the server lists (bild can hold a large image)
+SERVER_LIST_COLUMNS = "id, ip, port, motd, version, players_online, players_max, host, scanned_at"
+
+def get_servers_page(search_query="", keys=None, after=None, before=None, offset=0, limit=200):
+    """One page of the server list, newest first (ordered by scanned_at, id)
+
+    Keyset pagination: `after` is the (scanned_at, id) key of the last row
+    above the page, `before` the key of the first row below it; rows are
+    returned in list order either way. Without a key the page starts
+    `offset` rows into the list.
     """
     try:
         conn = sqlite3.connect(DATABASE_FILE)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
-        
-        if search_query:
-            # Check if search_query is a number (for player count search)
-            try:
-                player_count = int(search_query)
-                # Exact player count search
-                query = """
-                    SELECT * FROM servers 
-                    WHERE players_online = ?
-                    ORDER BY scanned_at DESC
-                """
-                cursor.execute(query, (player_count,))
-                results = [dict(row) for row in cursor.fetchall()]
-                conn.close()
-                return results
-            except ValueError:
-                # Not a number, do text search
-                query = """
-                    SELECT * FROM servers 
-                    WHERE ip LIKE ? OR motd LIKE ? OR version LIKE ? OR host LIKE ?
-                    ORDER BY scanned_at DESC
-                """
-                search_pattern = f"%{search_query}%"
-                cursor.execute(query, (search_pattern, search_pattern, search_pattern, search_pattern))
-                results = [dict(row) for row in cursor.fetchall()]
-                conn.close()
-                return results
-        else:
-            cursor.execute("SELECT * FROM servers ORDER BY scanned_at DESC LIMIT 1000000000000")
-            results = [dict(row) for row in cursor.fetchall()]
-            conn.close()
-            return results
+        where, params = server_filter(search_query, keys)
+        order = "DESC"
+        if after is not None:
+            where += (" AND " if where else " WHERE ") + "(scanned_at, id) < (?, ?)"
+            params += list(after)
+        elif before is not None:
+            where += (" AND " if where else " WHERE ") + "(scanned_at, id) > (?, ?)"
+            params += list(before)
+            order = "ASC"
+        query = (f"SELECT {SERVER_LIST_COLUMNS} FROM servers{where} "
+                 f"ORDER BY scanned_at {order}, id {order} LIMIT ?")
+        params.append(limit)
+        if after is None and before is None and offset:
+            query += " OFFSET ?"
+            params.append(offset)
+        cursor.execute(query, params)
+        results = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        if order == "ASC":
+            results.reverse()
+        return results
     except Exception as e:
         gui_print(f"[DB] Error getting servers: {e}")
         return []
 
+def count_servers(search_query="", keys=None):
+    """Number of servers matching a search (see server_filter)"""
+    try:
+        conn = sqlite3.connect(DATABASE_FILE)
+        where, params = server_filter(search_query, keys)
+        count = conn.execute(f"SELECT COUNT(*) FROM servers{where}", params).fetchone()[0]
+        conn.close()
+        return count
+    except Exception as e:
+        gui_print(f"[DB] Error counting servers: {e}")
+        return 0
+
+def get_server_keys(search_query="", keys=None):
+    """"ip:port" of every server matching a search (see server_filter)"""
+    try:
+        conn = sqlite3.connect(DATABASE_FILE)
+        where, params = server_filter(search_query, keys)
+        rows = conn.execute(f"SELECT ip || ':' || port FROM servers{where} ORDER BY scanned_at DESC", params)
+        results = [row[0] for row in rows]
+        conn.close()
+        return results
+    except Exception as e:
+        gui_print(f"[DB] Error getting servers: {e}")
+        return []
+
+def delete_servers(search_query="", keys=None):
+    """Delete every server matching a search (see server_filter), returns the number deleted"""
+    try:
+        conn = sqlite3.connect(DATABASE_FILE)
+        where, params = server_filter(search_query, keys)
+        deleted = conn.execute(f"DELETE FROM servers{where}", params).rowcount
+        conn.commit()
+        conn.close()
+        return deleted
+    except Exception as e:
+        gui_print(f"[DB] Error deleting servers: {e}")
+        return 0
+
+def get_server(ip, port):
+    """Full database row of one server, or None"""
+    try:
+        conn = sqlite3.connect(DATABASE_FILE)
+        conn.row_factory = sqlite3.Row
+        row = conn.execute("SELECT * FROM servers WHERE ip = ? AND port = ?", (ip, port)).fetchone()
+        conn.close()
+        return dict(row) if row else None
+    except Exception as e:
+        gui_print(f"[DB] Error getting server {ip}:{port}: {e}")
+        return None
+
 def get_server_count():
     """Get total server count"""
     try:
@@ -297,9 +397,176 @@ def update_server(ip, port, motd, version, players_online, players_max, host="",
 # Initialize database
 init_db()
 
+# ========= VIRTUAL SERVER LIST =========
+SERVER_LIST_PAGE = getattr(config, 'SERVER_LIST_PAGE', 100)  # Rows fetched per scroll step
+
+class ServerListView:
+    """
+    Virtualized server list on a ttk.Treeview.
+
+    The tree only holds a window of at most 3 * `page` rows around the
+    visible ones. Scrolling near either end of the window fetches the next
+    page with a keyset query (get_servers_page) and drops a page on the
+    other side. The scrollbar spans the whole result, whose size comes from
+    one COUNT query; dragging it jumps with an OFFSET query. Item ids are
+    database ids, so a selection survives scrolling while its row is loaded.
+    select_all() selects the whole query instead, see selected_query().
+    """
+
+    def __init__(self, tree, scrollbar, make_values, page=SERVER_LIST_PAGE):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.make_values = make_values  # row dict -> Treeview values
+        self.page = page
+        self.search = ""
+        self.keys = None
+        self.total = 0
+        self.offset = 0  # List position of rows[0]
+        self.rows = []   # Loaded rows in list order
+        self.all_selected = False  # Select All: every row of the query, loaded or not
+        self._pending = None  # Window shift scheduled on the Tk loop ("up" / "down")
+        tree.configure(yscrollcommand=self._on_tree_view)
+        scrollbar.configure(command=self._on_scrollbar)
+
+    @staticmethod
+    def _key(row):
+        return row["scanned_at"], row["id"]
+
+    def refresh(self, search="", keys=None, keep_position=False):
+        """Count the matching servers and load the first (or current) window"""
+        keys = set(keys) if keys is not None else None
+        if (search, keys) != (self.search, self.keys):
+            self.all_selected = False  # A different query, a different "all"
+        self.search = search
+        self.keys = keys
+        position = self._top_index() if keep_position else 0
+        self.total = count_servers(self.search, self.keys)
+        self.jump(position)
+        return self.total
+
+    def _top_index(self):
+        if not self.rows:
+            return 0
+        return self.offset + int(self.tree.yview()[0] * len(self.rows))
+
+    def _insert(self, rows, index="end"):
+        """Insert rows that are not loaded yet, returns them"""
+        fresh = [row for row in rows if not self.tree.exists(str(row["id"]))]
+        for position, row in enumerate(fresh):
+            self.tree.insert('', index if index == "end" else index + position,
+                             iid=str(row["id"]), values=self.make_values(row))
+        if self.all_selected and fresh:
+            self.tree.selection_add([str(row["id"]) for row in fresh])
+        return fresh
+
+    def select_all(self):
+        """Select every server of the query, including rows that are not loaded. Returns the count."""
+        self.all_selected = True
+        self.tree.selection_add(self.tree.get_children())
+        return self.total
+
+    def selected_query(self):
+        """
+        (search, keys) of the current query while Select All is in effect,
+        for bulk actions that run on the database. None once the user
+        changed the selection by hand; then only tree.selection() counts.
+        """
+        if self.all_selected and len(self.tree.selection()) == len(self.tree.get_children()):
+            return self.search, self.keys
+        self.all_selected = False
+        return None
+
+    def jump(self, index):
+        """Load the window around list position `index` and scroll it to the top"""
+        index = max(0, min(index, self.total - 1))
+        start = max(0, index - self.page)
+        self.tree.delete(*self.tree.get_children())
+        self.offset = start
+        self.rows = self._insert(get_servers_page(self.search, self.keys, offset=start, limit=3 * self.page))
+        if self.rows:
+            self.tree.yview_moveto((index - start) / len(self.rows))
+        self._update_scrollbar()
+
+    def _on_tree_view(self, first, last):
+        first, last = float(first), float(last)
+        self._update_scrollbar(first, last)
+        if self._pending is not None or not self.rows:
+            return
+        if last > 0.9 and self.offset + len(self.rows) < self.total:
+            self._pending = "down"
+        elif first < 0.1 and self.offset > 0:
+            self._pending = "up"
+        else:
+            return
+        self.tree.after_idle(self._shift)
+
+    def _shift(self):
+        """Fetch the next page in the scroll direction and drop one on the other side"""
+        direction, self._pending = self._pending, None
+        if not self.rows:
+            return
+        top = int(self.tree.yview()[0] * len(self.rows))  # First visible row within the window
+        limit = 3 * self.page
+        if direction == "down":
+            rows = self._insert(get_servers_page(self.search, self.keys, after=self._key(self.rows[-1]),
+                                                 limit=self.page))
+            if not rows:
+                self._resync(top)
+                return
+            self.rows += rows
+            excess = max(0, len(self.rows) - limit)
+            if excess:
+                self.tree.delete(*(str(row["id"]) for row in self.rows[:excess]))
+                self.rows = self.rows[excess:]
+                self.offset += excess
+                top -= excess
+        else:
+            rows = self._insert(get_servers_page(self.search, self.keys, before=self._key(self.rows[0]),
+                                                 limit=self.page), index=0)
+            if not rows:
+                self._resync(top)
+                return
+            self.offset = max(0, self.offset - len(rows))
+            self.rows = rows + self.rows
+            top += len(rows)
+            excess = max(0, len(self.rows) - limit)
+            if excess:
+                self.tree.delete(*(str(row["id"]) for row in self.rows[-excess:]))
+                self.rows = self.rows[:-excess]
+        if self.rows:
+            self.tree.yview_moveto(top / len(self.rows))
+        self._update_scrollbar()
+
+    def _resync(self, top):
+        """
+        The next page was empty or only held rows that are loaded already:
+        the list changed since the window was loaded. Recount and reload
+        the window around the first visible row.
+        """
+        self.total = count_servers(self.search, self.keys)
+        self.jump(self.offset + top)
+
+    def _update_scrollbar(self, first=None, last=None):
+        if not self.total or not self.rows:
+            self.scrollbar.set(0, 1)
+            return
+        if first is None:
+            first, last = self.tree.yview()
+        count = len(self.rows)
+        self.scrollbar.set((self.offset + first * count) / self.total,
+                           (self.offset + last * count) / self.total)
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self.jump(int(float(args[1]) * self.total))
+        else:
+            self.tree.yview(*args)
+
+
 # ========= YOURSERVERS HELPER FUNCTIONS =========
 # Store reference to the servers treeview for refreshing
 servers_tree = None
+servers_view = None  # ServerListView on servers_tree
 servers_search_var = None
 server_count_label = None  # Add reference to count label
 
@@ -340,79 +607,43 @@ def run_server_checker():
     except Exception as e:
         gui_print(f"[YourSERVERS] Failed to start checker thread: {e}", "error")
 
-def refresh_servers_list():
+def server_list_values(server, motd_length=40):
+    """Treeview values (ip:port, motd, version, players, last scanned) of a server row"""
+    ip_port = f"{server['ip']}:{server['port']}"
+    motd = server.get('motd', '') or ''
+    # Truncate MOTD if too long
+    if len(motd) > motd_length:
+        motd = motd[:motd_length - 3] + "..."
+    version = server.get('version', '') or 'Unknown'
+    players = f"{server.get('players_online', 0)}/{server.get('players_max', 0)}"
+    scanned_at = server.get('scanned_at', '') or ''
+    return ip_port, motd, version, players, scanned_at
+
+def refresh_servers_list(keep_position=True):
     """Refresh the servers list in the YourSERVERS tab"""
-    global servers_tree, servers_search_var, server_count_label
-    
-    if servers_tree is None:
+    if servers_view is None:
         return
     
     try:
-        # Clear existing items
-        for item in servers_tree.get_children():
-            servers_tree.delete(item)
-        
         # Get search query (ignore placeholder text)
         search_query = servers_search_var.get() if servers_search_var else ""
         if search_query == "Search servers...":
             search_query = ""
         
-        # Get servers from database
-        servers = get_servers_from_db(search_query)
-        
-        # Add servers to treeview
-        for server in servers:
-            ip_port = f"{server['ip']}:{server['port']}"
-            motd = server.get('motd', '') or ''
-            # Truncate MOTD if too long
-            if len(motd) > 40:
-                motd = motd[:37] + "..."
-            version = server.get('version', '') or 'Unknown'
-            players = f"{server.get('players_online', 0)}/{server.get('players_max', 0)}"
-            scanned_at = server.get('scanned_at', '') or ''
-            
-            servers_tree.insert('', 'end', values=(ip_port, motd, version, players, scanned_at))
+        total = servers_view.refresh(search_query, keep_position=keep_position)
         
         # Update server count label
         if server_count_label:
-            server_count_label.config(text=f"Servers: {len(servers)}")
+            server_count_label.config(text=f"Servers: {total}")
         
-        gui_print(f"[YourSERVERS] Loaded {len(servers)} servers from database", "scan")
+        gui_print(f"[YourSERVERS] Loaded {total} servers from database", "scan")
         
     except Exception as e:
         gui_print(f"[YourSERVERS] Error refreshing servers list: {e}", "error")
+
 def ping_single_server(ip, port):
     """Ping a single server and return the result"""
-    try:
-        s = socket.socket()
-        s.settimeout(config.TIMEOUT)
-        s.connect((ip, port))
-
-        handshake = (
-            encode_varint(0) +
-            encode_varint(754) +
-            encode_varint(len(ip)) + ip.encode() +
-            struct.pack(">H", port) +
-            encode_varint(1)
-        )
-
-        s.sendall(encode_varint(len(handshake)) + handshake)
-        s.sendall(b"\x01\x00")
-
-        decode_varint(s)
-        decode_varint(s)
-        length = decode_varint(s)
-
-        if not length:
-            s.close()
-            return None
-
-        data = s.recv(length)
-        s.close()
-        
-        return json.loads(data.decode())
-    except Exception:
-        return None
+    return query_status_sync(ip, port, config.TIMEOUT, CONNECT_TIMEOUT, FIRST_BYTE_TIMEOUT)
 
 
 def open_server_detail(server_data):
@@ -658,31 +889,72 @@ def open_server_detail(server_data):
 
 # ========= GUI OUTPUT FUNCTIONS =========
 def gui_print(message: str, tag: str = None):
-    global scan_log_text
-
-    if not scan_log_text:
+    """Queue a line for the scan log (safe from any thread, shown by gui_drain_log())"""
+    if scan_log_text is None:
+        if is_worker_mode:
+            print(message)  # Headless worker: the console is the log
         return
+    gui_message_queue.append((message, tag))
+
 
+def gui_drain_log():
+    """
+    Tk thread: move the queued log records into the scan log, all in one
+    insert per tick. Beyond GUI_LOG_LINES_PER_SECOND the oldest [SCAN]/[NONE]
+    lines are skipped first and replaced by a single summary line.
+    """
     try:
-        # Check if widget still exists
-        if not scan_log_text.winfo_exists():
+        if not scan_log_text or not scan_log_text.winfo_exists():
             return
-            
-        scan_log_text.insert("end", message + "\n", tag)
-        scan_log_text.see("end")
-
-        line_count = int(scan_log_text.index("end-1c").split(".")[0])
-        if line_count > 1200:
-            scan_log_text.delete("1.0", "300.0")
 
-    except Exception as e:
+        records = [gui_message_queue.popleft() for _ in range(len(gui_message_queue))]
+        budget = max(1, GUI_LOG_LINES_PER_SECOND * GUI_LOG_INTERVAL // 1000)
+        skipped = {}
+        if len(records) > budget:
+            important = sum(1 for _, tag in records if tag not in GUI_LOG_BULK_TAGS)
+            bulk_room = max(0, budget - important)
+            bulk_seen = sum(1 for _, tag in records if tag in GUI_LOG_BULK_TAGS)
+            bulk_skip = bulk_seen - bulk_room
+            kept = []
+            for message, tag in records:
+                if tag in GUI_LOG_BULK_TAGS and bulk_skip > 0:
+                    bulk_skip -= 1
+                    skipped[tag] = skipped.get(tag, 0) + 1
+                    continue
+                kept.append((message, tag))
+            # Even important lines are capped, the newest are kept
+            for message, tag in kept[:-budget]:
+                skipped[tag] = skipped.get(tag, 0) + 1
+            records = kept[-budget:]
+
+        if records or skipped:
+            args = []
+            if skipped:
+                detail = ", ".join(f"{tag or 'other'} {count}" for tag, count in skipped.items())
+                args += [f"[LOG] {sum(skipped.values())} lines skipped ({detail})\n", "skipped"]
+            for message, tag in records:
+                args += [message + "\n", tag]
+            scan_log_text.insert("end", *args)
+            scan_log_text.see("end")
+
+            line_count = int(scan_log_text.index("end-1c").split(".")[0])
+            if line_count > 1200:
+                scan_log_text.delete("1.0", f"{line_count - 900}.0")
+    except Exception:
         # Silently ignore GUI errors to prevent crashes
         pass
 
+    try:
+        if gui_root and gui_root.winfo_exists():
+            gui_root.after(GUI_LOG_INTERVAL, gui_drain_log)
+    except Exception:
+        pass
+
 
 def gui_clear():
     """Clear the scan log."""
     global scan_log_text
+    gui_message_queue.clear()
     if scan_log_text:
         try:
             scan_log_text.delete('1.0', tk.END)
@@ -701,18 +973,19 @@ def gui_update_stats():
             return
             
         # Get aggregated stats from all workers if master
+        local = counters.snapshot()
         if instance_mgr.is_master:
             all_stats = instance_mgr.get_all_stats()
-            total_scanned = scanned + all_stats["total_scanned"]
-            total_found = found + all_stats["total_found"]
-            total_with_players = with_players + all_stats["total_with_players"]
-            total_sent = sent_count + all_stats["total_sent"]
+            total_scanned = local["scanned"] + all_stats["total_scanned"]
+            total_found = local["found"] + all_stats["total_found"]
+            total_with_players = local["with_players"] + all_stats["total_with_players"]
+            total_sent = local["sent_count"] + all_stats["total_sent"]
             worker_count = all_stats["active_workers"]
         else:
-            total_scanned = scanned
-            total_found = found
-            total_with_players = with_players
-            total_sent = sent_count
+            total_scanned = local["scanned"]
+            total_found = local["found"]
+            total_with_players = local["with_players"]
+            total_sent = local["sent_count"]
             worker_count = 0
         
         # Safely update labels
@@ -751,9 +1024,8 @@ def gui_update_stats():
         
         if recent_box and recent_box.winfo_exists():
             recent_box.delete(0, tk.END)
-            with recent_found_lock:
-                for ip in list(recent_found):
-                    recent_box.insert(tk.END, ip)
+            for ip in list(recent_found):
+                recent_box.insert(tk.END, ip)
     except Exception as e:
         # Silently ignore GUI errors
         pass
@@ -819,13 +1091,23 @@ def gui_update_advanced_stats():
             advanced_stats_labels["current_rate"].config(text=f"{current_rate:.1f}/s")
         if "peak_scans" in advanced_stats_labels and advanced_stats_labels["peak_scans"].winfo_exists():
             advanced_stats_labels["peak_scans"].config(text=f"{max_peak_scans:.1f}")
+        if "concurrency" in advanced_stats_labels and advanced_stats_labels["concurrency"].winfo_exists():
+            advanced_stats_labels["concurrency"].config(
+                text=f"{concurrency_limiter.status()}  [{active_loop}]\n{socket_budget.status()}")
+        if "loop" in advanced_stats_labels and advanced_stats_labels["loop"].winfo_exists():
+            advanced_stats_labels["loop"].config(text=loop_watchdog.status())
+        if "latency" in advanced_stats_labels and advanced_stats_labels["latency"].winfo_exists():
+            advanced_stats_labels["latency"].config(text="\n".join(
+                f"{phase:<10} {format_percentiles(hist)}" for phase, hist in merged_latency().items()))
+        if "ports" in advanced_stats_labels and advanced_stats_labels["ports"].winfo_exists():
+            advanced_stats_labels["ports"].config(text=format_port_stats())
+        if "profile" in advanced_stats_labels and advanced_stats_labels["profile"].winfo_exists():
+            advanced_stats_labels["profile"].config(text="profiling..." if profiler.running else last_profile)
         
         # Update scan history for graph (every second)
         now = time.time()
-        with scan_times_lock:
-            # Count scans in the last second
-            one_second_ago = now - 1
-            scans_last_second = sum(1 for ts in scan_times if ts >= one_second_ago)
+        # Scans in the last complete second
+        scans_last_second = scan_rate.per_second(1)[0]
         
         with scan_history_lock:
             scan_history.append((now, scans_last_second))
@@ -918,20 +1200,40 @@ def gui_update_advanced_stats():
 
 
 # ========= COUNTER =========
-scanned = 0
-found = 0
-with_players = 0
-sent_count = 0
-counter_lock = threading.Lock()  # Thread-safe counter updates
+# Sharded per thread: the scan path never takes a lock, readers (GUI,
+# worker stats) add the shards up with counters.snapshot()
+counters = ShardedCounters("scanned", "found", "with_players", "sent_count")
+
+# per-second scan counts of the last hour (for rate calculation)
+scan_rate = ShardedRateCounter(3600)
+
+# Latency histograms per probe phase (seconds), recorded on the event loop
+# thread. Workers send theirs to the master with their stats.
+latency = {
+    "connect": LatencyHistogram(),     # TCP connect of open ports
+    "first_byte": LatencyHistogram(),  # Status request sent -> first response byte
+    "response": LatencyHistogram(),    # Whole SLP handshake until the status JSON is read
+    "json_parse": LatencyHistogram(),  # json.loads() of the status response
+    "db_write": LatencyHistogram(),    # update_server() of found servers
+    "webhook": LatencyHistogram(),     # Discord webhook round trip
+}
 
 
-# timestamps of recent scans (for rate calculation)
-scan_times: deque = deque(maxlen=1000)
+def merged_latency() -> dict:
+    """Latency histograms of this instance plus all workers (master), per phase."""
+    workers = instance_mgr.get_all_stats()["worker_details"].values() if instance_mgr.is_master else ()
+    merged = {}
+    for phase, hist in latency.items():
+        remote = [LatencyHistogram.from_dict(w["latency"][phase]) for w in workers if phase in w.get("latency", {})]
+        merged[phase] = merge_histograms([hist] + remote)
+    return merged
 
-scan_times_lock = threading.Lock()
-# recent found servers (most-recent first)
+# Webhook tasks created but not finished yet
+webhooks_pending = 0
+
+# recent found servers (most-recent first); deque appends and list()
+# copies are atomic, no lock needed
 recent_found: deque = deque(maxlen=20)
-recent_found_lock = threading.Lock()
 
 # ========= TITLE =========
 def set_title():
@@ -939,6 +1241,7 @@ def set_title():
     global last_title_scan_count
     now = time.time()
     # Only update if enough time has passed OR enough scans have occurred
+    scanned = counters.value("scanned")
     time_ok = (now - last_title_update) >= TITLE_MIN_SECONDS
     scans_ok = (scanned - last_title_scan_count) >= TITLE_SCAN_STEP
     if not (time_ok or scans_ok):
@@ -950,62 +1253,25 @@ def set_title():
 #========= RATE CALCULATION =========
 def compute_rate_per_hour(window_seconds: int = 60) -> float:
     """Compute an extrapolated servers/hour rate over last `window_seconds` seconds."""
-    now = time.time()
-    cutoff = now - window_seconds
-    with scan_times_lock:
-        count = 0
-        for ts in reversed(scan_times):
-            if ts >= cutoff:
-                count += 1
-            else:
-                break
     if window_seconds == 0:
         return 0.0
-    return (count / window_seconds) * 3600.0
+    return scan_rate.rate(window_seconds) * 3600.0
 
 def compute_scans_per_minute(window_seconds: int = 60) -> float:
     """Compute scans per minute over last `window_seconds` seconds."""
-    now = time.time()
-    cutoff = now - window_seconds
-    with scan_times_lock:
-        count = 0
-        for ts in reversed(scan_times):
-            if ts >= cutoff:
-                count += 1
-            else:
-                break
     if window_seconds == 0:
         return 0.0
-    return (count / window_seconds) * 60.0
+    return scan_rate.rate(window_seconds) * 60.0
 
 def compute_found_per_minute(window_seconds: int = 60) -> float:
     """Compute servers found per minute over last `window_seconds` seconds."""
-    # Track found timestamps
-    global found_times, found_times_lock
-    try:
-        found_times
-    except NameError:
-        found_times = deque(maxlen=10000)
-        found_times_lock = threading.Lock()
-    
-    now = time.time()
-    cutoff = now - window_seconds
-    with found_times_lock:
-        count = 0
-        for ts in reversed(found_times):
-            if ts >= cutoff:
-                count += 1
-            else:
-                break
     if window_seconds == 0:
         return 0.0
-    return (count / window_seconds) * 60.0
-
+    return found_rate.rate(window_seconds) * 60.0
 
-# Track found server timestamps
-found_times: deque = deque(maxlen=1000)
 
-found_times_lock = threading.Lock()
+# Track found servers per second
+found_rate = ShardedRateCounter(3600)
 
 # ========= ADVANCED STATS TRACKING =========
 # 10-second scan history for graph (1-second buckets)
@@ -1026,18 +1292,47 @@ last_graph_update = 0  # Timestamp of last graph update
 
 
 # ========= CONFIG FUNCTIONS =========
-def save_config_settings(webhook_url, port, timeout, concurrency, web_host, web_port):
-    """Save settings to config.py file"""
+def _config_literal(value) -> str:
+    if isinstance(value, str):
+        return json.dumps(value)
+    return repr(value)
+
+
+def save_config_settings(webhook_url, port, timeout, concurrency, web_host, web_port, **extra):
+    """
+    Save settings to config.py file.
+    Keyword arguments in `extra` are written as additional KEY = value lines;
+    other settings already in the file (e.g. advanced ones) are kept.
+    """
+    settings = {
+        "WEBHOOK_URL": webhook_url,
+        "PORT": port,
+        "TIMEOUT": timeout,
+        "CONCURRENCY": concurrency,
+        "WEB_HOST": web_host,
+        "WEB_PORT": web_port,
+    }
+    settings.update(extra)
     try:
         config_path = os.path.join(os.path.dirname(__file__), "config", "config.py")
+        try:
+            with open(config_path, "r", encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            lines = []
+
+        out = []
+        for line in lines:
+            key = line.split("=", 1)[0].strip()
+            if "=" in line and key in settings:
+                out.append(f"{key} = {_config_literal(settings.pop(key))}")
+            else:
+                out.append(line)
+        for key, value in settings.items():
+            out.append(f"{key} = {_config_literal(value)}")
+
         with open(config_path, "w", encoding="utf-8") as f:
-            f.write(f'''WEBHOOK_URL = "{webhook_url}"
-PORT = {port}
-TIMEOUT = {timeout}
-CONCURRENCY = {concurrency}
-WEB_HOST = "{web_host}"
-WEB_PORT = {web_port}
-''')
+            f.write("\n".join(out) + "\n")
         return True
     except Exception as e:
         gui_print(f"[ERROR] Failed to save config: {e}")
@@ -1059,6 +1354,7 @@ def load_ascii_art():
 # ========= MAIN GUI WINDOW =========
 def run_main_gui():
     global gui_root, scan_log_text, stats_labels, recent_box
+    global servers_tree, servers_view, servers_search_var, server_count_label
 
     if tk is None:
         return
@@ -1273,48 +1569,25 @@ def run_main_gui():
         """Check if server is favorite"""
         return "⭐" if ip_port in db_favorites else "  "
     
-    def refresh_database_list():
-        """Refresh the database server list"""
+    def db_row_values(server):
+        """Treeview values of a database row, with the favorite marker in front"""
+        values = server_list_values(server, motd_length=45)
+        return (is_favorite(values[0]),) + values
+
+    def refresh_database_list(keep_position=True):
+        """Refresh the database server list (only the rows around the visible ones are loaded)"""
         try:
-            # Clear existing items
-            for item in db_tree.get_children():
-                db_tree.delete(item)
-            
             # Get search query
             search_query = db_search_var.get() if db_search_var else ""
             if search_query == "🔍 Search servers...":
                 search_query = ""
             
-            # Get servers from database
-            servers = get_servers_from_db(search_query)
-            
-            # Apply filters
-            filtered_servers = []
-            for server in servers:
-                ip_port = f"{server['ip']}:{server['port']}"
-                
-                # Favorites filter
-                if db_filter_favorites.get() and ip_port not in db_favorites:
-                    continue
-                
-                filtered_servers.append(server)
-            
-            # Add servers to treeview
-            for server in filtered_servers:
-                ip_port = f"{server['ip']}:{server['port']}"
-                motd = server.get('motd', '') or ''
-                # Truncate MOTD if too long
-                if len(motd) > 45:
-                    motd = motd[:42] + "..."
-                version = server.get('version', '') or 'Unknown'
-                players = f"{server.get('players_online', 0)}/{server.get('players_max', 0)}"
-                scanned_at = server.get('scanned_at', '') or ''
-                fav = is_favorite(ip_port)
-                
-                db_tree.insert('', 'end', values=(fav, ip_port, motd, version, players, scanned_at))
+            # Favorites filter
+            keys = db_favorites if db_filter_favorites.get() else None
+            total = db_view.refresh(search_query, keys, keep_position=keep_position)
             
             # Update count label
-            db_count_label.config(text=f"Servers: {len(filtered_servers)}")
+            db_count_label.config(text=f"Servers: {total}")
             
         except Exception as e:
             gui_print(f"[DATABASE] Error loading servers: {e}", "error")
@@ -1343,11 +1616,9 @@ def run_main_gui():
             db_auto_refresh_job = database_content.after(30000, schedule_auto_refresh)
     
     def select_all_servers():
-        """Select all visible servers"""
-        for item in db_tree.get_children():
-            db_tree.selection_add(item)
-        count = len(db_tree.get_children())
-        gui_print(f"[DATABASE] Selected {count} servers", "scan")
+        """Select every server of the current search, including the rows that are not loaded"""
+        total = db_view.select_all()
+        gui_print(f"[DATABASE] Selected all {total} servers", "scan")
     
     def ping_selected_servers():
         """Ping all selected servers"""
@@ -1368,8 +1639,15 @@ def run_main_gui():
     
     def delete_selected_servers():
         """Delete all selected servers"""
-        selected = get_selected_servers()
-        if not selected:
+        query = db_view.selected_query()
+        if query is not None:
+            # Select All: count and delete in SQL, rows that are not loaded included
+            selected = None
+            count = count_servers(*query)
+        else:
+            selected = get_selected_servers()
+            count = len(selected)
+        if not count:
             gui_print("[DATABASE] No servers selected!", "error")
             return
         
@@ -1381,15 +1659,20 @@ def run_main_gui():
         confirm.transient(gui_root)
         confirm.grab_set()
         
-        tk.Label(confirm, text=f"Delete {len(selected)} servers?", 
+        tk.Label(confirm, text=f"Delete {count} servers?", 
                 bg=BG, fg=PINK, font=("Consolas", 14, "bold")).pack(pady=20)
         
         btn_frame = tk.Frame(confirm, bg=BG)
         btn_frame.pack(pady=10)
         
         def do_delete():
-            for ip_port in selected:
-                delete_server_from_db(ip_port)
+            if selected is None:
+                deleted = delete_servers(*query)
+                gui_print(f"[DATABASE] Deleted {deleted} servers", "scan")
+                refresh_database_list()
+            else:
+                for ip_port in selected:
+                    delete_server_from_db(ip_port)
             confirm.destroy()
         
         tk.Button(btn_frame, text="✅ Yes, Delete", command=do_delete,
@@ -1401,7 +1684,10 @@ def run_main_gui():
                  padx=20, pady=5).pack(side="left", padx=5)
     
     def get_selected_servers():
-        """Get list of selected server IP:ports"""
+        """Get list of selected server IP:ports (all matching servers after Select All)"""
+        query = db_view.selected_query()
+        if query is not None:
+            return get_server_keys(*query)
         selected = []
         for item in db_tree.selection():
             values = db_tree.item(item, 'values')
@@ -1562,7 +1848,7 @@ def run_main_gui():
     tk.Checkbutton(db_filter_frame, text="⭐ Favorites", variable=db_filter_favorites,
                   bg=BG, fg=CYAN, selectcolor=CARD, activebackground=BG,
                   activeforeground=PINK, font=("Consolas", 9),
-                  command=refresh_database_list).pack(side="left", padx=5)
+                  command=lambda: refresh_database_list(keep_position=False)).pack(side="left", padx=5)
     
     # Bulk Actions Frame
     db_bulk_frame = tk.Frame(database_content, bg=BG)
@@ -1640,9 +1926,9 @@ def run_main_gui():
     db_tree.column("scanned_at", width=150, minwidth=120)
 
 
-    # Scrollbar
-    db_scroll = tk.Scrollbar(db_tree_frame, orient="vertical", command=db_tree.yview)
-    db_tree.configure(yscrollcommand=db_scroll.set)
+    # Scrollbar (driven by the virtual list)
+    db_scroll = tk.Scrollbar(db_tree_frame, orient="vertical")
+    db_view = ServerListView(db_tree, db_scroll, db_row_values)
 
     db_tree.pack(side="left", fill="both", expand=True)
     db_scroll.pack(side="right", fill="y")
@@ -1650,9 +1936,14 @@ def run_main_gui():
     # Load favorites on startup
     load_favorites()
 
-    # Search function
+    # Search function (runs once typing pauses)
+    db_search_job = None
+
     def on_db_search_changed(*args):
-        refresh_database_list()
+        nonlocal db_search_job
+        if db_search_job:
+            database_content.after_cancel(db_search_job)
+        db_search_job = database_content.after(250, lambda: refresh_database_list(keep_position=False))
 
     db_search_var.trace_add("write", on_db_search_changed)
 
@@ -1678,13 +1969,7 @@ def run_main_gui():
                 # Get full server data from database
                 try:
                     ip, port_str = ip_port.rsplit(':', 1)
-                    port = int(port_str)
-                    servers = get_servers_from_db("")
-                    server_data = None
-                    for s in servers:
-                        if s['ip'] == ip and s['port'] == port:
-                            server_data = s
-                            break
+                    server_data = get_server(ip, int(port_str))
                     if server_data:
                         open_server_detail(server_data)
                 except Exception as e:
@@ -1743,6 +2028,42 @@ def run_main_gui():
     advanced_stats_labels["peak_scans"] = tk.Label(stats_grid, text="0.0", bg=CARD, fg="#ff00aa", font=("Consolas", 16, "bold"))
     advanced_stats_labels["peak_scans"].grid(row=3, column=1, padx=20, pady=5)
 
+    # Row 3: Adaptive concurrency decision
+    tk.Label(stats_grid, text="🎛️ Concurrency", bg=CARD, fg=PINK, font=("Consolas", 10, "bold")).grid(row=4, column=0, columnspan=2, padx=20, pady=5)
+    advanced_stats_labels["concurrency"] = tk.Label(stats_grid, text="-", bg=CARD, fg="#00ffea", font=("Consolas", 11, "bold"))
+    advanced_stats_labels["concurrency"].grid(row=5, column=0, columnspan=2, padx=20, pady=5)
+
+    # Row 4: Event loop health
+    tk.Label(stats_grid, text="🩺 Event Loop", bg=CARD, fg=PINK, font=("Consolas", 10, "bold")).grid(row=6, column=0, columnspan=2, padx=20, pady=5)
+    advanced_stats_labels["loop"] = tk.Label(stats_grid, text="-", bg=CARD, fg="#00ffea", font=("Consolas", 9), justify="left")
+    advanced_stats_labels["loop"].grid(row=7, column=0, columnspan=2, padx=20, pady=5)
+
+    # Row 5: Latency percentiles per probe phase
+    tk.Label(stats_grid, text="⏱️ Latency", bg=CARD, fg=PINK, font=("Consolas", 10, "bold")).grid(row=8, column=0, columnspan=2, padx=20, pady=5)
+    advanced_stats_labels["latency"] = tk.Label(stats_grid, text="-", bg=CARD, fg="#00ffea", font=("Consolas", 9), justify="left")
+    advanced_stats_labels["latency"].grid(row=9, column=0, columnspan=2, padx=20, pady=5)
+
+    # Row 6: Per-port hit rates
+    tk.Label(stats_grid, text="🔌 Ports", bg=CARD, fg=PINK, font=("Consolas", 10, "bold")).grid(row=10, column=0, columnspan=2, padx=20, pady=5)
+    advanced_stats_labels["ports"] = tk.Label(stats_grid, text="-", bg=CARD, fg="#00ffea", font=("Consolas", 9), justify="left")
+    advanced_stats_labels["ports"].grid(row=11, column=0, columnspan=2, padx=20, pady=5)
+
+    # Row 7: On-demand sampling profiler (this instance and all workers)
+    tk.Button(
+        stats_grid,
+        text=f"🔥 PROFILE {PROFILE_SECONDS}s",
+        command=lambda: start_profile(include_workers=True),
+        bg="#1a1a1a",
+        fg=PINK,
+        activebackground=PINK,
+        activeforeground="black",
+        font=("Consolas", 10, "bold"),
+        relief="flat",
+        cursor="hand2"
+    ).grid(row=12, column=0, padx=20, pady=5)
+    advanced_stats_labels["profile"] = tk.Label(stats_grid, text="-", bg=CARD, fg="#00ffea", font=("Consolas", 9), justify="left")
+    advanced_stats_labels["profile"].grid(row=12, column=1, padx=20, pady=5)
+
     # Graph Frame
     graph_frame = tk.Frame(advanced_panel, bg="#020202", highlightbackground=PURPLE, highlightthickness=1)
     graph_frame.pack(fill="both", expand=True, padx=20, pady=10)
@@ -1777,8 +2098,9 @@ def run_main_gui():
     # Y-axis label
     scan_graph_canvas.create_text(20, 20, text="MAX", fill="#666666", font=("Consolas", 8), tags="grid")
 
-    # Start stats update loops
+    # Start stats update and log drain loops
     gui_root.after(500, gui_update_stats)
+    gui_root.after(GUI_LOG_INTERVAL, gui_drain_log)
     gui_root.after(1000, gui_update_advanced_stats)
 
     # ================= YOURSERVERS TAB ================= !!! ARCHIVED FOR NOW, CAN BE REWORKED LATER !!!
@@ -1825,9 +2147,14 @@ def run_main_gui():
     search_entry.bind("<FocusIn>", on_search_focus_in)
     search_entry.bind("<FocusOut>", on_search_focus_out)
     
-    # Search function
+    # Search function (runs once typing pauses)
+    search_job = None
+
     def on_search_changed(*args):
-        refresh_servers_list()
+        nonlocal search_job
+        if search_job:
+            search_entry.after_cancel(search_job)
+        search_job = search_entry.after(250, lambda: refresh_servers_list(keep_position=False))
     
     servers_search_var.trace_add("write", on_search_changed)
 
@@ -1916,9 +2243,9 @@ def run_main_gui():
     servers_tree.column("players", width=80, minwidth=60)
     servers_tree.column("scanned_at", width=150, minwidth=100)
 
-    # Scrollbar
-    tree_scroll = tk.Scrollbar(tree_frame, orient="vertical", command=servers_tree.yview)
-    servers_tree.configure(yscrollcommand=tree_scroll.set)
+    # Scrollbar (driven by the virtual list)
+    tree_scroll = tk.Scrollbar(tree_frame, orient="vertical")
+    servers_view = ServerListView(servers_tree, tree_scroll, server_list_values)
 
     servers_tree.pack(side="left", fill="both", expand=True)
     tree_scroll.pack(side="right", fill="y")
@@ -1934,13 +2261,7 @@ def run_main_gui():
                 # Get full server data from database
                 try:
                     ip, port_str = ip_port.rsplit(':', 1)
-                    port = int(port_str)
-                    servers = get_servers_from_db("")
-                    server_data = None
-                    for s in servers:
-                        if s['ip'] == ip and s['port'] == port:
-                            server_data = s
-                            break
+                    server_data = get_server(ip, int(port_str))
                     if server_data:
                         open_server_detail(server_data)
                 except Exception as e:
@@ -1990,6 +2311,7 @@ def run_main_gui():
     scan_log_text.tag_config("empty", foreground="#00ffaa")
     scan_log_text.tag_config("webhook", foreground="#00e1ff")
     scan_log_text.tag_config("error", foreground="#ff00ff")
+    scan_log_text.tag_config("skipped", foreground="#666666")
 
     # ================= STATS PANEL =================
     stats_panel = tk.Frame(scanner_content, bg=CARD, highlightbackground=PURPLE, highlightthickness=2)
@@ -2075,15 +2397,29 @@ def run_main_gui():
     webhook_entry.insert(0, config.WEBHOOK_URL)
     config_fields.append(("webhook", webhook_entry))
 
-    # PORT
-    tk.Label(scrollable_frame, text="PORT", bg=BG, fg=PINK, font=("Consolas", 10, "bold")).pack(pady=(15,5))
-    port_entry = tk.Entry(scrollable_frame, bg=CARD, fg="#00ffea", insertbackground=PINK, font=("Consolas", 10), width=20, bd=2, highlightbackground=PURPLE, highlightthickness=1)
+    # PORTS
+    tk.Label(scrollable_frame, text="PORTS (e.g. 25565 or 25565-25575,25580)", bg=BG, fg=PINK, font=("Consolas", 10, "bold")).pack(pady=(15,5))
+    port_entry = tk.Entry(scrollable_frame, bg=CARD, fg="#00ffea", insertbackground=PINK, font=("Consolas", 10), width=40, bd=2, highlightbackground=PURPLE, highlightthickness=1)
     port_entry.pack(pady=5)
-    port_entry.insert(0, str(config.PORT))
+    port_entry.insert(0, str(getattr(config, 'PORTS', config.PORT)))
     config_fields.append(("port", port_entry))
 
+    # CONNECT_TIMEOUT
+    tk.Label(scrollable_frame, text="CONNECT TIMEOUT (seconds)", bg=BG, fg=PINK, font=("Consolas", 10, "bold")).pack(pady=(15,5))
+    connect_timeout_entry = tk.Entry(scrollable_frame, bg=CARD, fg="#00ffea", insertbackground=PINK, font=("Consolas", 10), width=20, bd=2, highlightbackground=PURPLE, highlightthickness=1)
+    connect_timeout_entry.pack(pady=5)
+    connect_timeout_entry.insert(0, str(CONNECT_TIMEOUT))
+    config_fields.append(("connect_timeout", connect_timeout_entry))
+
+    # FIRST_BYTE_TIMEOUT
+    tk.Label(scrollable_frame, text="FIRST BYTE TIMEOUT (seconds)", bg=BG, fg=PINK, font=("Consolas", 10, "bold")).pack(pady=(15,5))
+    first_byte_entry = tk.Entry(scrollable_frame, bg=CARD, fg="#00ffea", insertbackground=PINK, font=("Consolas", 10), width=20, bd=2, highlightbackground=PURPLE, highlightthickness=1)
+    first_byte_entry.pack(pady=5)
+    first_byte_entry.insert(0, str(FIRST_BYTE_TIMEOUT))
+    config_fields.append(("first_byte_timeout", first_byte_entry))
+
     # TIMEOUT
-    tk.Label(scrollable_frame, text="TIMEOUT (seconds)", bg=BG, fg=PINK, font=("Consolas", 10, "bold")).pack(pady=(15,5))
+    tk.Label(scrollable_frame, text="RESPONSE TIMEOUT (seconds)", bg=BG, fg=PINK, font=("Consolas", 10, "bold")).pack(pady=(15,5))
     timeout_entry = tk.Entry(scrollable_frame, bg=CARD, fg="#00ffea", insertbackground=PINK, font=("Consolas", 10), width=20, bd=2, highlightbackground=PURPLE, highlightthickness=1)
     timeout_entry.pack(pady=5)
     timeout_entry.insert(0, str(config.TIMEOUT))
@@ -2121,13 +2457,19 @@ def run_main_gui():
     def save_settings():
         try:
             webhook = webhook_entry.get()
-            port = int(port_entry.get())
-            timeout = int(timeout_entry.get())
+            ports_text = port_entry.get().strip()
+            port = parse_ports(ports_text)[0]
+            connect_timeout = float(connect_timeout_entry.get())
+            first_byte_timeout = float(first_byte_entry.get())
+            timeout = float(timeout_entry.get())
+            if min(connect_timeout, first_byte_timeout, timeout) <= 0:
+                raise ValueError("timeouts must be positive")
             concurrency = int(concurrency_entry.get())
             webhost = webhost_entry.get()
             webport = int(webport_entry.get())
             
-            if save_config_settings(webhook, port, timeout, concurrency, webhost, webport):
+            if save_config_settings(webhook, port, timeout, concurrency, webhost, webport, PORTS=ports_text,
+                                    CONNECT_TIMEOUT=connect_timeout, FIRST_BYTE_TIMEOUT=first_byte_timeout):
                 settings_status.config(text="✅ Settings saved! Restart required.", fg="#00ff99")
             else:
                 settings_status.config(text="❌ Failed to save settings!", fg="#ff0055")
@@ -2138,7 +2480,11 @@ def run_main_gui():
         webhook_entry.delete(0, tk.END)
         webhook_entry.insert(0, config.WEBHOOK_URL)
         port_entry.delete(0, tk.END)
-        port_entry.insert(0, str(config.PORT))
+        port_entry.insert(0, str(getattr(config, 'PORTS', config.PORT)))
+        connect_timeout_entry.delete(0, tk.END)
+        connect_timeout_entry.insert(0, str(CONNECT_TIMEOUT))
+        first_byte_entry.delete(0, tk.END)
+        first_byte_entry.insert(0, str(FIRST_BYTE_TIMEOUT))
         timeout_entry.delete(0, tk.END)
         timeout_entry.insert(0, str(config.TIMEOUT))
         concurrency_entry.delete(0, tk.END)
@@ -2541,56 +2887,166 @@ def random_ip():
         return f"{a}.{b}.{c}.{d}"
 
 
-# ========= VARINT =========
-def encode_varint(v):
-    out = b""
-    while True:
-        b = v & 0x7F
-        v >>= 7
-        out += struct.pack("B", b | (0x80 if v else 0))
-        if not v:
-            return out
-
-def decode_varint(sock):
-    num = 0
-    for i in range(5):
-        b = sock.recv(1)
-        if not b:
-            return None
-        b = b[0]
-        num |= (b & 0x7F) << (7 * i)
-        if not b & 0x80:
-            return num
-    return None
+# Operator exclusion list (CIDR per line), checked by every target source.
+# Edits to the file are picked up while scanning.
+EXCLUDE_FILE = getattr(config, 'EXCLUDE_FILE', "config//exclude.txt")
+exclusion_list = ExclusionList(EXCLUDE_FILE)
+try:
+    exclusion_list.load()
+except Exception as e:
+    # Scanning without the operator's exclusions is worse than not scanning
+    print(f"[EXCLUDE] Failed to load {EXCLUDE_FILE}: {e}")
+    print("[EXCLUDE] Fix the file and start again, nothing was scanned")
+    sys.exit(1)
 
 
-# ========= MINECRAFT PING =========
-def ping(ip):
+def reload_exclusions():
+    """Pick up changes to the exclusion file, keeping the old list on errors."""
     try:
-        s = socket.socket()
-        s.settimeout(config.TIMEOUT)
-        s.connect((ip, config.PORT))
-
-        handshake = (
-            encode_varint(0) +
-            encode_varint(754) +
-            encode_varint(len(ip)) + ip.encode() +
-            struct.pack(">H", config.PORT) +
-            encode_varint(1)
-        )
+        if exclusion_list.maybe_reload():
+            gui_print(f"[EXCLUDE] Reloaded {exclusion_list.prefix_count} excluded prefixes", "scan")
+    except Exception as e:
+        gui_print(f"[EXCLUDE] Reload failed, keeping previous list: {e}", "error")
 
-        s.sendall(encode_varint(len(handshake)) + handshake)
-        s.sendall(b"\x01\x00")
 
-        decode_varint(s)
-        decode_varint(s)
-        length = decode_varint(s)
+# Batch generator with the same weighting, used by the scan pipeline
+TARGET_BATCH_SIZE = getattr(config, 'TARGET_BATCH_SIZE', 4096)
+ip_generator = BatchIPGenerator(ASN_RANGES, ASN_PROB, ASN_EXPAND_BITS, exclusions=exclusion_list)
+
+# Target source:
+#   "random"          - random_ip() weighting, samples with replacement (default)
+#   "permutation"     - every public IPv4 address exactly once, resumable
+#   "permutation_asn" - every address of ASN_RANGES exactly once, resumable
+TARGET_MODE = getattr(config, 'TARGET_MODE', 'random')
+TARGET_SEED = getattr(config, 'TARGET_SEED', 0)
+TARGET_SHARD = getattr(config, 'TARGET_SHARD', 0)
+TARGET_SHARDS = getattr(config, 'TARGET_SHARDS', 1)
+TARGET_CHECKPOINT_INTERVAL = getattr(config, 'TARGET_CHECKPOINT_INTERVAL', 100000)
+
+
+# ========= MINECRAFT PING =========
+# Two-stage probe: a cheap connect sweep with a short timeout and high
+# concurrency, then the full SLP handshake on the few ports that are
+# actually open. Every phase has its own deadline (float seconds):
+# CONNECT_TIMEOUT for the TCP connect, FIRST_BYTE_TIMEOUT until the server
+# starts answering and TIMEOUT for the whole status response.
+CONNECT_TIMEOUT = getattr(config, 'CONNECT_TIMEOUT', 1.0)
+FIRST_BYTE_TIMEOUT = getattr(config, 'FIRST_BYTE_TIMEOUT', config.TIMEOUT)
+SLP_CONCURRENCY = getattr(config, 'SLP_CONCURRENCY', max(10, config.CONCURRENCY // 10))
+
+# Connect sweeps in flight start at CONCURRENCY and are adjusted at runtime
+# between CONCURRENCY_MIN and CONCURRENCY_MAX (timeouts, local errors, loop
+# lag, free fds). ADAPTIVE_CONCURRENCY = False keeps it fixed.
+if getattr(config, 'ADAPTIVE_CONCURRENCY', True):
+    CONCURRENCY_MIN = getattr(config, 'CONCURRENCY_MIN', max(10, config.CONCURRENCY // 10))
+    CONCURRENCY_MAX = getattr(config, 'CONCURRENCY_MAX', config.CONCURRENCY * 4)
+else:
+    CONCURRENCY_MIN = CONCURRENCY_MAX = config.CONCURRENCY
+
+# Raise the fd limit and keep connect sweeps + handshakes within what the
+# process can actually open (fds and local ports).
+socket_budget = SocketBudget(reserve=getattr(config, 'FD_RESERVE', 128))
+_max_sockets = socket_budget.max_sockets()
+if _max_sockets is not None and CONCURRENCY_MAX + SLP_CONCURRENCY > _max_sockets:
+    CONCURRENCY_MAX = max(1, _max_sockets - SLP_CONCURRENCY)
+    CONCURRENCY_MIN = min(CONCURRENCY_MIN, CONCURRENCY_MAX)
+    print(f"[SOCKETS] Concurrency capped to {CONCURRENCY_MAX} "
+          f"(fd limit {socket_budget.fd_soft}, local ports {socket_budget.port_range})")
+
+concurrency_limiter = AdaptiveLimiter(
+    config.CONCURRENCY, CONCURRENCY_MIN, CONCURRENCY_MAX,
+    step=getattr(config, 'CONCURRENCY_STEP', None),
+    max_loop_lag=getattr(config, 'CONCURRENCY_MAX_LOOP_LAG', 0.1),
+    budget=socket_budget,
+)
 
-        data = s.recv(length)
-        s.close()
-        return json.loads(data.decode())
-    except:
-        return None
+
+
+
+# ========= PORTS =========
+def parse_ports(text) -> list:
+    """Parse a port list like "25565-25575, 25580" into sorted unique ports."""
+    ports = set()
+    for part in str(text).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = (int(p) for p in part.split("-", 1))
+        else:
+            first = last = int(part)
+        if not 1 <= first <= last <= 65535:
+            raise ValueError(f"invalid port range: {part}")
+        ports.update(range(first, last + 1))
+    if not ports:
+        raise ValueError("no ports given")
+    return sorted(ports)
+
+
+# Every target host is probed on each of these ports (default: PORT only).
+# PORT_SHARES optionally weights the connect-sweep concurrency per port,
+# e.g. {25565: 4} gives 25565 four times the slots of any other port.
+SCAN_PORTS = parse_ports(getattr(config, 'PORTS', config.PORT))
+PORT_SHARES = getattr(config, 'PORT_SHARES', {})
+
+# Per-port hit-rate stats: probes, open ports and Minecraft servers found,
+# keyed by (port, "probed" / "open" / "found" / "local")
+PORT_STAT_KEYS = ("probed", "open", "found", "local")
+port_stats = ShardedCounters(*((port, key) for port in SCAN_PORTS for key in PORT_STAT_KEYS))
+
+
+def count_port_stat(port, key):
+    port_stats.add((port, key))
+
+
+def format_port_stats(max_lines: int = 12) -> str:
+    """One line per port: probes, open ports, servers found and hit rate."""
+    totals = port_stats.snapshot()
+    rows = [(port, {key: totals.get((port, key), 0) for key in PORT_STAT_KEYS}) for port in SCAN_PORTS]
+    rows.sort(key=lambda row: row[1]["found"], reverse=True)
+    lines = []
+    for port, stats in rows[:max_lines]:
+        # Probes that failed locally say nothing about the port
+        reached = stats["probed"] - stats["local"]
+        hit_rate = stats["found"] / reached * 100 if reached else 0.0
+        line = (f"{port:>5}  probed {stats['probed']:>9}  open {stats['open']:>6}  "
+                f"found {stats['found']:>5}  hit {hit_rate:.3f}%")
+        if stats["local"]:
+            line += f"  local errors {stats['local']}"
+        lines.append(line)
+    if len(rows) > max_lines:
+        lines.append(f"... {len(rows) - max_lines} more ports")
+    return "\n".join(lines)
+
+
+def port_concurrency(concurrency: int) -> dict:
+    """Split `concurrency` connect slots over SCAN_PORTS by PORT_SHARES."""
+    shares = {port: PORT_SHARES.get(port, 1) for port in SCAN_PORTS}
+    total = sum(shares.values()) or 1
+    return {port: max(1, round(concurrency * share / total)) for port, share in shares.items()}
+
+
+async def probe_port(ip, port):
+    """Stage 1: open a TCP connection to the scan port. Returns (connection or None, outcome)."""
+    start = time.perf_counter()
+    connection, outcome = await connect(ip, port, CONNECT_TIMEOUT)
+    if connection is not None:
+        latency["connect"].record(time.perf_counter() - start)
+    concurrency_limiter.record(outcome)
+    return connection, outcome
+
+
+async def ping(ip, port, connection):
+    """Stage 2: run the status handshake on an open connection."""
+    start = time.perf_counter()
+    timings = {}
+    data = await query_connection(*connection, ip, port, config.TIMEOUT, FIRST_BYTE_TIMEOUT, timings)
+    if "first_byte" in timings:
+        latency["first_byte"].record(timings["first_byte"])
+    if data is not None:
+        latency["response"].record(time.perf_counter() - start)
+        latency["json_parse"].record(timings["json_parse"])
+    return data
 
 
 # ========= WEBHOOK =========
@@ -2607,179 +3063,344 @@ async def webhook(msg):
         payload["content"] = msg
 
     try:
+        start = time.perf_counter()
         async with http_session.post(
             config.WEBHOOK_URL,
             json=payload
         ) as r:
+            latency["webhook"].record(time.perf_counter() - start)
             if r.status not in (200, 204):
                 gui_print(f"[WEBHOOK ERROR] {r.status}", "error")
     except Exception as e:
         gui_print(f"[WEBHOOK FAIL] {e}", "error")
 
 
+def queue_webhook(msg):
+    """Send a webhook in the background, tracked in webhooks_pending."""
+    global webhooks_pending
+    webhooks_pending += 1
+
+    def done(_task):
+        global webhooks_pending
+        webhooks_pending -= 1
+
+    asyncio.create_task(webhook(msg)).add_done_callback(done)
+
+
+def store_server(ip, port, motd, version, players_online, players_max):
+    """update_server() for the scan path, timed for the db_write histogram."""
+    start = time.perf_counter()
+    update_server(ip, port, motd, version, players_online, players_max, "", "")
+    latency["db_write"].record(time.perf_counter() - start)
+
+
 # ========= SCAN =========
-async def scan(ip, sem):
-    global scanned, found, with_players, sent_count
+async def sweep(ip, port):
+    """Count a probe and check whether its port is open. Returns the connection or None."""
+    counters.add("scanned")
+    scan_rate.add()
 
-    async with sem:
-        try:
-            with counter_lock:
-                scanned += 1
-        except Exception:
-            pass
-            
-        try:
-            with scan_times_lock:
-                scan_times.append(time.time())
-        except Exception:
-            pass
-            
+    try:
+        set_title()
+    except Exception:
+        pass
+    if LOG_SCAN:
+        gui_print(f"[SCAN] {ip}:{port}", "scan")
+
+    count_port_stat(port, "probed")
+    try:
+        connection, outcome = await probe_port(ip, port)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        connection, outcome = None, None
+
+    if outcome == LOCAL_ERROR:
+        # Out of fds/ports/buffers on our side, not a miss
+        socket_budget.count_failure()
+        count_port_stat(port, "local")
+    elif connection is None:
+        if LOG_NONE:
+            gui_print(f"[NONE] {ip}:{port}", "none")
+    else:
+        count_port_stat(port, "open")
+    return connection
+
+
+async def scan(ip, port, connection):
+    """Query the status of an open port and report/store the server."""
+    try:
+        data = await ping(ip, port, connection)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        data = None
+
+    if not data:
+        if LOG_NONE:
+            gui_print(f"[NONE] {ip}:{port}", "none")
+        return
+
+    count_port_stat(port, "found")
+    counters.add("found")
+    found_rate.add()
+    recent_found.appendleft(f"{ip}:{port}")
+
+    try:
+        set_title()
+    except Exception:
+        pass
+
+    try:
+        players = data["players"]["online"]
+        maxp = data["players"]["max"]
+        version = data["version"]["name"]
+        motd = data["description"]
+        if isinstance(motd, dict):
+            motd = motd.get("text", "")
+    except (KeyError, TypeError):
+        return
+
+    if players > 0:
+        counters.add("with_players")
         try:
             set_title()
-            gui_print(f"[SCAN] {ip}", "scan")
         except Exception:
             pass
 
+        if LOG_ONLINE:
+            gui_print(f"[ONLINE] {ip}:{port} {players}/{maxp} {version}", "online")
+
+        # Build a Discord embed payload
+        motd_text = motd or "-"
+        if len(motd_text) > 1020:
+            motd_text = motd_text[:1017] + "..."
+
+        embed = {
+            "title": "Minecraft Server Online",
+            "description": f"{ip}:{port}",
+            "color": 3066993,
+            "fields": [
+                {"name": "Spieler", "value": f"{players}/{maxp}", "inline": True},
+                {"name": "Version", "value": version, "inline": True},
+                {"name": "MOTD", "value": motd_text, "inline": False},
+            ]
+        }
+
+        key = f"{ip}:{port}"
         try:
-            data = await asyncio.get_running_loop().run_in_executor(executor, ping, ip)
+            if await mark_sent(key):
+                queue_webhook(embed)
+                # Auto-save to database
+                store_server(ip, port, motd, version, players, maxp)
+                counters.add("sent_count")
+                if LOG_WEBHOOK:
+                    gui_print("[WEBHOOK] queued", "webhook")
+            elif LOG_WEBHOOK:
+                gui_print(f"[SKIP] {key} already sent", "webhook")
         except asyncio.CancelledError:
             raise
-        except Exception:
-            data = None
-
-        if not data:
-            try:
-                gui_print(f"[NONE] {ip}", "none")
-            except Exception:
-                pass
-            return
+        except Exception as e:
+            gui_print(f"[SKIP] {key} error: {e}", "error")
 
+    else:
+        if LOG_EMPTY:
+            gui_print(f"[EMPTY] {ip}:{port} 0/{maxp} {version}", "empty")
+
+        motd_text = motd or "-"
+        if len(motd_text) > 1020:
+            motd_text = motd_text[:1017] + "..."
+
+        empty_embed = {
+            "title": "Minecraft Server Empty",
+            "description": f"{ip}:{port}",
+            "color": 15105570,
+            "fields": [
+                {"name": "Spieler", "value": f"0/{maxp}", "inline": True},
+                {"name": "Version", "value": version, "inline": True},
+                {"name": "MOTD", "value": motd_text, "inline": False},
+            ]
+        }
+
+        key = f"{ip}:{port}"
         try:
-            with counter_lock:
-                found += 1
-        except Exception:
-            pass
-            
-        try:
-            with recent_found_lock:
-                recent_found.appendleft(f"{ip}:{config.PORT}")
-        except Exception:
-            pass
-            
-        # Track found server timestamp for rate calculation
-        try:
-            with found_times_lock:
-                found_times.append(time.time())
-        except Exception:
-            pass
-            
-        try:
-            set_title()
-        except Exception:
-            pass
+            if await mark_sent(key):
+                queue_webhook(empty_embed)
+                # Auto-save to database
+                store_server(ip, port, motd, version, 0, maxp)
+                counters.add("sent_count")
+                if LOG_WEBHOOK:
+                    gui_print("[WEBHOOK] queued (empty)", "webhook")
+            elif LOG_WEBHOOK:
+                gui_print(f"[SKIP] {key} already sent", "webhook")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            gui_print(f"[SKIP] {key} error: {e}", "error")
 
-        try:
-            players = data["players"]["online"]
-            maxp = data["players"]["max"]
-            version = data["version"]["name"]
-            motd = data["description"]
-            if isinstance(motd, dict):
-                motd = motd.get("text", "")
-        except (KeyError, TypeError):
-            return
 
-        if players > 0:
-            try:
-                with counter_lock:
-                    with_players += 1
-                set_title()
-            except Exception:
-                pass
 
-            text = f"[ONLINE] {ip} {players}/{maxp} {version}"
-            gui_print(text, "online")
-
-            # Build a Discord embed payload
-            motd_text = motd or "-"
-            if len(motd_text) > 1020:
-                motd_text = motd_text[:1017] + "..."
-
-            embed = {
-                "title": "Minecraft Server Online",
-                "description": f"{ip}:{config.PORT}",
-                "color": 3066993,
-                "fields": [
-                    {"name": "Spieler", "value": f"{players}/{maxp}", "inline": True},
-                    {"name": "Version", "value": version, "inline": True},
-                    {"name": "MOTD", "value": motd_text, "inline": False},
-                ]
-            }
-
-            key = f"{ip}:{config.PORT}"
+# ========= SCAN PIPELINE =========
+def random_targets(limit: int = None):
+    """Yield random target IPs, forever or until `limit` targets were produced."""
+    produced = 0
+    while limit is None or produced < limit:
+        reload_exclusions()
+        batch_size = TARGET_BATCH_SIZE if limit is None else min(TARGET_BATCH_SIZE, limit - produced)
+        batch = ip_generator.next_batch(batch_size)
+        yield from batch
+        produced += len(batch)
+
+
+def permutation_checkpoint_file() -> str:
+    return f"ressources//permutation_{TARGET_MODE}_{TARGET_SEED}_{TARGET_SHARD}of{TARGET_SHARDS}.json"
+
+
+def load_permutation() -> AddressPermutation:
+    """Resume the target permutation from its checkpoint, or start a new one."""
+    cidrs = ASN_RANGES if TARGET_MODE == "permutation_asn" else None
+    try:
+        with open(permutation_checkpoint_file(), "r", encoding="utf-8") as f:
+            perm = AddressPermutation.from_state(json.load(f), cidrs, exclusions=exclusion_list)
+        gui_print(f"[TARGETS] Resumed permutation at {perm.progress * 100:.4f}%", "scan")
+        return perm
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        gui_print(f"[TARGETS] Ignoring unusable checkpoint: {e}", "error")
+    return AddressPermutation(cidrs, seed=TARGET_SEED, shard=TARGET_SHARD, shards=TARGET_SHARDS,
+                              exclusions=exclusion_list)
+
+
+def save_permutation(perm: AddressPermutation):
+    try:
+        with open(permutation_checkpoint_file(), "w", encoding="utf-8") as f:
+            json.dump(perm.state(), f)
+    except Exception as e:
+        gui_print(f"[TARGETS] Failed to save checkpoint: {e}", "error")
+
+
+def permutation_targets(limit: int = None):
+    """
+    Yield targets from the persisted address permutation, never repeating an
+    address. The position is checkpointed every TARGET_CHECKPOINT_INTERVAL
+    targets and when the generator is closed; targets still queued in the
+    pipeline at that moment are not scanned again after a restart.
+    """
+    perm = load_permutation()
+    produced = 0
+    since_checkpoint = 0
+    try:
+        while limit is None or produced < limit:
+            reload_exclusions()
+            batch_size = TARGET_BATCH_SIZE if limit is None else min(TARGET_BATCH_SIZE, limit - produced)
+            batch = perm.next_batch(batch_size)
+            if not batch:
+                gui_print("[TARGETS] Permutation complete, every target was scanned", "online")
+                break
+            yield from batch
+            produced += len(batch)
+            since_checkpoint += len(batch)
+            if since_checkpoint >= TARGET_CHECKPOINT_INTERVAL:
+                save_permutation(perm)
+                since_checkpoint = 0
+    finally:
+        save_permutation(perm)
+
+
+def make_targets(limit: int = None):
+    """Target generator for the configured TARGET_MODE"""
+    if TARGET_MODE == "random":
+        return random_targets(limit)
+    return permutation_targets(limit)
+
+
+async def scan_pipeline(targets, limiter: AdaptiveLimiter = None, slp_concurrency: int = None):
+    """
+    Scan every IP from `targets` on every port of SCAN_PORTS in two stages
+    with fixed pools of long-lived consumers. Up to `limiter.maximum`
+    connect sweepers take ip/port pairs from a bounded queue. A sweeper
+    first waits for its port's share (PORT_SHARES of the maximum), then for
+    one of the `limiter` slots, so a port at its share never holds a global
+    slot other ports could use. Open ports go to `slp_concurrency` handshake
+    consumers through a second bounded queue.
+    Runs until the targets run out or stop_event is set.
+    """
+    if limiter is None:
+        limiter = concurrency_limiter
+    if slp_concurrency is None:
+        slp_concurrency = SLP_CONCURRENCY
+    concurrency = limiter.maximum
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    open_queue: asyncio.Queue = asyncio.Queue(maxsize=slp_concurrency * 2)
+
+    port_limits = {port: asyncio.Semaphore(limit) for port, limit in port_concurrency(concurrency).items()}
+
+    async def producer():
+        try:
+            for ip in targets:
+                if stop_event.is_set():
+                    break
+                # Fan every host out to all scan ports
+                for port in SCAN_PORTS:
+                    await queue.put((ip, port))
+        finally:
+            # One sentinel per consumer so every consumer exits cleanly
+            for _ in range(concurrency):
+                await queue.put(None)
+
+    async def sweeper():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            ip, port = item
             try:
-                if await mark_sent(key):
-                    asyncio.create_task(webhook(embed))
-                    # Auto-save to database
-                    update_server(ip, config.PORT, motd, version, players, maxp, "", "")
-                    with counter_lock:
-                        sent_count += 1
-                    gui_print(f"[WEBHOOK] queued", "webhook")
-                else:
-                    gui_print(f"[SKIP] {key} already sent", "webhook")
+                # Port share first: waiting for it must not hold a limiter slot
+                async with port_limits[port], limiter:
+                    connection = await sweep(ip, port)
             except asyncio.CancelledError:
                 raise
             except Exception as e:
-                gui_print(f"[SKIP] {key} error: {e}", "error")
+                gui_print(f"[ERROR] Sweep of {ip}:{port} failed: {e}", "error")
+                continue
+            if connection is not None:
+                await open_queue.put((ip, port, connection))
 
-        else:
-            gui_print(f"[EMPTY] {ip} 0/{maxp} {version}", "empty")
-
-            motd_text = motd or "-"
-            if len(motd_text) > 1020:
-                motd_text = motd_text[:1017] + "..."
-
-            empty_embed = {
-                "title": "Minecraft Server Empty",
-                "description": f"{ip}:{config.PORT}",
-                "color": 15105570,
-                "fields": [
-                    {"name": "Spieler", "value": f"0/{maxp}", "inline": True},
-                    {"name": "Version", "value": version, "inline": True},
-                    {"name": "MOTD", "value": motd_text, "inline": False},
-                ]
-            }
-
-            key = f"{ip}:{config.PORT}"
+    async def handshaker():
+        while True:
+            item = await open_queue.get()
+            if item is None:
+                return
+            ip, port, connection = item
             try:
-                if await mark_sent(key):
-                    asyncio.create_task(webhook(empty_embed))
-                    # Auto-save to database
-                    update_server(ip, config.PORT, motd, version, 0, maxp, "", "")
-                    with counter_lock:
-                        sent_count += 1
-                    gui_print(f"[WEBHOOK] queued (empty)", "webhook")
-                else:
-                    gui_print(f"[SKIP] {key} already sent", "webhook")
+                await scan(ip, port, connection)
             except asyncio.CancelledError:
                 raise
             except Exception as e:
-                gui_print(f"[SKIP] {key} error: {e}", "error")
-
-        # Update worker local stats if in worker mode
-        if is_worker_mode:
-            try:
-                with worker_stats_lock:
-                    worker_local_stats["scanned"] = scanned
-                    worker_local_stats["found"] = found
-                    worker_local_stats["with_players"] = with_players
-                    worker_local_stats["sent_count"] = sent_count
-            except Exception:
-                pass
+                gui_print(f"[ERROR] Scan of {ip}:{port} failed: {e}", "error")
 
+    sweepers = [asyncio.create_task(sweeper()) for _ in range(concurrency)]
+    handshakers = [asyncio.create_task(handshaker()) for _ in range(slp_concurrency)]
+    controller = asyncio.create_task(limiter.run())
+    try:
+        await asyncio.gather(producer(), *sweepers)
+        for _ in range(slp_concurrency):
+            await open_queue.put(None)
+        await asyncio.gather(*handshakers)
+    finally:
+        controller.cancel()
+        for task in sweepers + handshakers:
+            task.cancel()
+        # Close connections that were opened but never handed to a handshaker
+        while not open_queue.empty():
+            item = open_queue.get_nowait()
+            if item is not None:
+                close_fast(item[2][1])
 
 
 # ========= SCANNER RUN =========
-async def run_scanner_instance(sem, instance_num, total_runs):
+async def run_scanner_instance(instance_num, total_runs):
     """Run a single scanner instance with a defined number of IPs."""
     global current_run, runs_completed
     
@@ -2790,37 +3411,12 @@ async def run_scanner_instance(sem, instance_num, total_runs):
     except Exception:
         pass
     
-    tasks = []
-    scanned_in_run = 0
-    
-    while scanned_in_run < ips_per_run:
-        if stop_event.is_set():
-            break
-            
-        try:
-            tasks.append(asyncio.create_task(scan(random_ip(), sem)))
-            scanned_in_run += 1
-        except Exception:
-            continue
-        
-        if len(tasks) >= config.CONCURRENCY * 2:
-            try:
-                await asyncio.gather(*tasks, return_exceptions=True)
-            except asyncio.CancelledError:
-                break
-            except Exception:
-                pass
-            tasks.clear()
-    
-    # Gather remaining tasks
-    if tasks:
-        try:
-            await asyncio.gather(*tasks, return_exceptions=True)
-        except asyncio.CancelledError:
-            pass
-        except Exception:
-            pass
-        tasks.clear()
+    try:
+        await scan_pipeline(make_targets(ips_per_run))
+    except asyncio.CancelledError:
+        pass
+    except Exception:
+        pass
     
     try:
         runs_completed += 1
@@ -2834,13 +3430,164 @@ async def run_scanner_instance(sem, instance_num, total_runs):
 
 
 
+# ========= WATCHDOG =========
+# Event loop lag / executor monitor; logs the loop thread's stack when the
+# loop is blocked longer than WATCHDOG_LAG_THRESHOLD seconds.
+loop_watchdog = LoopWatchdog(
+    interval=getattr(config, 'WATCHDOG_INTERVAL', 0.1),
+    threshold=getattr(config, 'WATCHDOG_LAG_THRESHOLD', 0.25),
+    cooldown=getattr(config, 'WATCHDOG_SAMPLE_COOLDOWN', 30.0),
+)
+
+
+# ========= PROFILER =========
+# On-demand sampling profiler, started from the ADVANCED tab (master and all
+# workers), with SIGUSR1 (any process) or by a "profile" command from the
+# master (workers). Writes a collapsed-stack file for flame graphs and a
+# top-functions summary to PROFILE_DIR. Samples the event loop (main thread)
+# unless PROFILE_ALL_THREADS is set; idle waits are left out either way.
+PROFILE_SECONDS = getattr(config, 'PROFILE_SECONDS', 30)
+profiler = SamplingProfiler(
+    output_dir=getattr(config, 'PROFILE_DIR', 'profiles'),
+    interval=1.0 / getattr(config, 'PROFILE_HZ', 100),
+    all_threads=getattr(config, 'PROFILE_ALL_THREADS', False),
+)
+last_profile = "-"  # Summary file of the last finished profile
+
+
+def start_profile(seconds: float = None, include_workers: bool = False) -> bool:
+    """Profile this process for `seconds` (default PROFILE_SECONDS) in the background"""
+    seconds = seconds or PROFILE_SECONDS
+    instance = "master" if instance_mgr.is_master else f"worker-{instance_mgr.instance_id[:8]}"
+    log = print if is_worker_mode else gui_print
+
+    if include_workers and instance_mgr.is_master:
+        workers = instance_mgr.send_command_to_workers("profile", seconds=seconds)
+        if workers:
+            log(f"[PROFILE] Requested a {seconds}s profile from {workers} worker(s)")
+
+    def done(path: str, summary: str):
+        global last_profile
+        last_profile = path or "failed"
+        if not path:
+            log(summary)
+            return
+        # Header and the first rows of the self-time table
+        _, _, rest = summary.partition("\n\nTop ")
+        table = ("Top " + rest).split("\n\n")[0].splitlines()[:11]
+        log(f"[PROFILE] {instance}: {path}\n" + "\n".join(table))
+
+    if not profiler.start(seconds, on_done=done, label=instance):
+        log("[PROFILE] A profile is already running")
+        return False
+    threads = "all threads" if profiler.all_threads else "the event loop"
+    log(f"[PROFILE] {instance}: sampling {threads} for {seconds}s at {1.0 / profiler.interval:.0f} Hz")
+    return True
+
+
+def on_master_command(message: dict):
+    """Commands from the master, delivered with the stats acknowledgment (worker only)"""
+    if message.get("command") == "profile":
+        start_profile(message.get("seconds"))
+
+
+def install_profile_signal():
+    """SIGUSR1 starts a PROFILE_SECONDS profile (Unix only, main thread only)"""
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, lambda signum, frame: start_profile())
+
+
+# ========= METRICS =========
+# OpenMetrics endpoint on WEB_HOST:WEB_PORT/metrics for scraping headless runs
+METRICS_ENABLED = getattr(config, 'METRICS_ENABLED', True)
+metrics_server = None
+
+
+def collect_metrics() -> str:
+    """Render all scanner metrics in OpenMetrics text format."""
+    out = MetricsWriter()
+    local = counters.snapshot()
+    instance = "master" if instance_mgr.is_master else f"worker-{instance_mgr.instance_id[:8]}"
+    workers = instance_mgr.get_all_stats()["worker_details"] if instance_mgr.is_master else {}
+
+    def per_instance(key):
+        samples = [({"instance": instance}, local[key])]
+        samples += [({"instance": f"worker-{wid[:8]}"}, stats[key]) for wid, stats in workers.items()]
+        return samples
+
+    out.counter("mcs_scanned", "Probes sent (ip:port pairs)", per_instance("scanned"))
+    out.counter("mcs_found", "Minecraft servers found", per_instance("found"))
+    out.counter("mcs_with_players", "Servers found with at least one player", per_instance("with_players"))
+    out.counter("mcs_webhooks_sent", "Webhooks queued for new servers", per_instance("sent_count"))
+    out.gauge("mcs_scans_per_minute", "Scan rate over the last minute",
+              [({"instance": instance}, compute_scans_per_minute(60))]
+              + [({"instance": f"worker-{wid[:8]}"}, stats["scans_per_minute"]) for wid, stats in workers.items()])
+    out.gauge("mcs_active_workers", "Workers connected to this master", [(None, len(workers))])
+
+    ports = port_stats.snapshot()
+    for key, help_text in (("probed", "Probes per scan port"),
+                           ("open", "Open ports per scan port"),
+                           ("found", "Servers found per scan port"),
+                           ("local", "Probes that failed on local resources per scan port")):
+        out.counter(f"mcs_port_{key}", help_text,
+                    [({"port": port}, ports.get((port, key), 0)) for port in SCAN_PORTS])
+    out.counter("mcs_local_errors", "Connects that failed for lack of fds, ports or buffers",
+                [(None, socket_budget.local_failures)])
+
+    out.gauge("mcs_probes_in_flight", "Connect sweeps in flight", [(None, concurrency_limiter.in_flight)])
+    out.gauge("mcs_concurrency_limit", "Current adaptive connect limit", [(None, concurrency_limiter.limit)])
+    out.gauge("mcs_event_loop_lag_seconds", "Event loop scheduling lag at the last heartbeat",
+              [(None, loop_watchdog.lag)])
+    out.histogram("mcs_event_loop_lag_histogram_seconds", "Event loop scheduling lag",
+                  [(None, loop_watchdog.histogram)])
+    out.counter("mcs_event_loop_stalls", f"Loop blocked longer than {loop_watchdog.threshold}s",
+                [(None, loop_watchdog.stalls)])
+    out.gauge("mcs_executor_queue_depth", "Jobs waiting for the loop's default executor",
+              [(None, loop_watchdog.executor_queue())])
+    out.gauge("mcs_executor_threads", "Threads of the loop's default executor",
+              [(None, loop_watchdog.executor_threads())])
+    out.gauge("mcs_webhook_queue_depth", "Webhooks queued but not sent yet", [(None, webhooks_pending)])
+    if socket_budget.time_wait is not None:
+        out.gauge("mcs_sockets_time_wait", "TCP sockets in TIME_WAIT on this host (all processes)", [(None, socket_budget.time_wait)])
+
+    # Latency histograms of this instance and of every worker
+    histograms = [(instance, latency)]
+    for wid, stats in workers.items():
+        remote = {phase: LatencyHistogram.from_dict(data) for phase, data in stats.get("latency", {}).items()}
+        histograms.append((f"worker-{wid[:8]}", remote))
+    out.histogram("mcs_probe_latency_seconds", "Probe latency per phase",
+                  [({"instance": name, "phase": phase}, hists[phase])
+                   for name, hists in histograms
+                   for phase in ("connect", "first_byte", "response", "json_parse") if phase in hists])
+    out.histogram("mcs_db_write_seconds", "Time the scan path spends writing a found server to SQLite",
+                  [({"instance": name}, hists["db_write"]) for name, hists in histograms if "db_write" in hists])
+    out.histogram("mcs_webhook_seconds", "Discord webhook round trip",
+                  [({"instance": name}, hists["webhook"]) for name, hists in histograms if "webhook" in hists])
+    return out.text()
+
+
+async def start_metrics_server():
+    """Serve /metrics on WEB_HOST:WEB_PORT (logs and continues if the port is taken)."""
+    global metrics_server
+    if not METRICS_ENABLED or metrics_server is not None:
+        return
+    server = MetricsServer(config.WEB_HOST, config.WEB_PORT, collect_metrics)
+    try:
+        await server.start()
+    except OSError as e:
+        gui_print(f"[METRICS] Could not listen on {config.WEB_HOST}:{config.WEB_PORT}: {e}", "error")
+        return
+    metrics_server = server
+    gui_print(f"[METRICS] Serving http://{config.WEB_HOST}:{config.WEB_PORT}/metrics", "scan")
+
+
 # ========= WORKER MODE MAIN =========
 async def worker_main():
     """Main loop for worker instances (no GUI)"""
-    global scanned, found, with_players, sent_count, is_worker_mode
+    global is_worker_mode
     
     is_worker_mode = True
-    sem = asyncio.Semaphore(config.CONCURRENCY)
+    set_log_categories(WORKER_LOG_CATEGORIES)
     
     print(f"[WORKER] Started worker instance (ID: {instance_mgr.instance_id})")
     print("[WORKER] Connecting to master...")
@@ -2850,27 +3597,32 @@ async def worker_main():
         return
     
     print("[WORKER] Connected to master, starting scan...")
+    instance_mgr.set_command_callback(on_master_command)
+    loop_watchdog.start()
+    await start_metrics_server()
     
     # Start stats reporting task
     async def report_stats():
         while True:
             try:
                 await asyncio.sleep(2)  # Report every 2 seconds
-                with worker_stats_lock:
-                    # Calculate current rates for advanced stats
-                    scans_per_min = compute_scans_per_minute(60)
-                    found_per_min = compute_found_per_minute(60)
-                    
-                    instance_mgr.send_worker_stats(
-                        worker_local_stats["scanned"],
-                        worker_local_stats["found"],
-                        worker_local_stats["with_players"],
-                        worker_local_stats["sent_count"],
-                        peak_scans_per_minute=peak_scans_per_minute,
-                        peak_found_per_minute=peak_found_per_minute,
-                        scans_per_minute=scans_per_min,
-                        found_per_minute=found_per_min
-                    )
+                stats = counters.snapshot()
+
+                # Calculate current rates for advanced stats
+                scans_per_min = compute_scans_per_minute(60)
+                found_per_min = compute_found_per_minute(60)
+
+                instance_mgr.send_worker_stats(
+                    stats["scanned"],
+                    stats["found"],
+                    stats["with_players"],
+                    stats["sent_count"],
+                    peak_scans_per_minute=peak_scans_per_minute,
+                    peak_found_per_minute=peak_found_per_minute,
+                    scans_per_minute=scans_per_min,
+                    found_per_minute=found_per_min,
+                    latency={phase: hist.to_dict() for phase, hist in latency.items()}
+                )
             except asyncio.CancelledError:
                 break
             except Exception as e:
@@ -2880,15 +3632,12 @@ async def worker_main():
     
     # Run scanner and stats reporter concurrently
     async def scanner_loop():
-        tasks = []
-        while True:
-            if stop_event.is_set():
-                break
+        while not stop_event.is_set():
             try:
-                tasks.append(asyncio.create_task(scan(random_ip(), sem)))
-                if len(tasks) >= config.CONCURRENCY * 2:
-                    await asyncio.gather(*tasks, return_exceptions=True)
-                    tasks.clear()
+                await scan_pipeline(make_targets())
+                if TARGET_MODE != "random" and not stop_event.is_set():
+                    print("[WORKER] Target permutation exhausted, scanning stopped")
+                    break
             except asyncio.CancelledError:
                 break
             except Exception as e:
@@ -2907,12 +3656,76 @@ async def worker_main():
 
 
 
+# ========= PROCESS LAUNCHER =========
+# `--processes N` starts N-1 extra worker processes next to the master. Each
+# process runs its own event loop on a disjoint shard of the target
+# permutation and reports its counters to the master over the normal
+# master/worker IPC.
+launch_processes = 1
+active_loop = "asyncio"  # Event loop implementation, see install_event_loop()
+worker_processes = []
+
+
+def parse_args(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Cyber MCS Scanner")
+    parser.add_argument("--processes", type=int, default=getattr(config, 'PROCESSES', 1),
+                        help="number of scanner processes to run, each on its own shard (0 = one per CPU core)")
+    parser.add_argument("--shard", metavar="I/N",
+                        help="only scan shard I of N of the target permutation")
+    parser.add_argument("--worker", action="store_true",
+                        help="run as headless worker of an already running master")
+    parser.add_argument("--loop", choices=LOOP_CHOICES, default=getattr(config, 'EVENT_LOOP', "auto"),
+                        help="event loop implementation (auto = uvloop if installed)")
+    parser.add_argument("--no-metrics", action="store_true",
+                        help="do not serve /metrics (set for the shard workers of --processes)")
+    return parser.parse_args(argv)
+
+
+def apply_shard(shard: int, shards: int):
+    """Restrict this process to one shard; sharding needs a permutation target mode."""
+    global TARGET_SHARD, TARGET_SHARDS, TARGET_MODE
+    if not 0 <= shard < shards:
+        raise ValueError(f"invalid shard {shard}/{shards}")
+    TARGET_SHARD, TARGET_SHARDS = shard, shards
+    if TARGET_MODE == "random":
+        TARGET_MODE = "permutation"
+
+
+def spawn_shard_workers(processes: int):
+    """Start worker processes for shards 1..N-1, the master scans shard 0."""
+    script = os.path.abspath(__file__)
+    for shard in range(1, processes):
+        # The master serves /metrics for all of them
+        cmd = [sys.executable, script, "--worker", "--shard", f"{shard}/{processes}",
+               "--loop", active_loop, "--no-metrics"]
+        try:
+            worker_processes.append(subprocess.Popen(cmd))
+        except Exception as e:
+            gui_print(f"[LAUNCHER] Failed to start shard {shard}/{processes}: {e}", "error")
+    gui_print(f"[LAUNCHER] Started {len(worker_processes)} shard workers ({TARGET_MODE})", "scan")
+
+
+def stop_shard_workers():
+    for proc in worker_processes:
+        try:
+            proc.terminate()
+        except Exception:
+            pass
+    for proc in worker_processes:
+        try:
+            proc.wait(timeout=5)
+        except Exception:
+            proc.kill()
+    worker_processes.clear()
+
+
 # ========= MAIN =========
 async def main():
     global current_run, target_runs, is_worker_mode
     
-    # Check if we should run as master or worker
-    is_master = instance_mgr.check_master()
+    # The role was decided in __main__ (before the shard was applied)
+    is_master = instance_mgr.is_master
     
     if not is_master:
         # Run as worker - no GUI
@@ -2930,8 +3743,12 @@ async def main():
         print(f"[MASTER] Failed to start as master: {e}")
         return
 
+    if launch_processes > 1:
+        spawn_shard_workers(launch_processes)
+
+    loop_watchdog.start()
+    await start_metrics_server()
     
-    sem = asyncio.Semaphore(config.CONCURRENCY)
     gui_print("=== MINECRAFT SERVER SCANNER STARTED ===", "scan")
     gui_print("Enter 'run 2-10' in CONNECT field for multi-run mode", "scan")
     gui_print("Standard mode: infinite scan\n", "scan")
@@ -2946,7 +3763,7 @@ async def main():
             if stop_event.is_set():
                 break
             try:
-                await run_scanner_instance(sem, run_num, target_runs)
+                await run_scanner_instance(run_num, target_runs)
             except asyncio.CancelledError:
                 break
             except Exception as e:
@@ -2955,9 +3772,10 @@ async def main():
         
         try:
             gui_print(f"\n=== ALL {target_runs} RUNS COMPLETED ===", "online")
-            gui_print("Total servers scanned: " + str(scanned), "online")
-            gui_print("Total servers found: " + str(found), "online")
-            gui_print("Total with players: " + str(with_players), "online")
+            totals = counters.snapshot()
+            gui_print("Total servers scanned: " + str(totals["scanned"]), "online")
+            gui_print("Total servers found: " + str(totals["found"]), "online")
+            gui_print("Total with players: " + str(totals["with_players"]), "online")
         except Exception:
             pass
         
@@ -2969,32 +3787,52 @@ async def main():
                 break
     else:
         # Standard infinite mode
-        tasks = []
-        while True:
-            if stop_event.is_set():
-                break
+        while not stop_event.is_set():
             try:
-                tasks.append(asyncio.create_task(scan(random_ip(), sem)))
-                if len(tasks) >= config.CONCURRENCY * 2:
-                    await asyncio.gather(*tasks, return_exceptions=True)
-                    tasks.clear()
+                await scan_pipeline(make_targets())
+                if TARGET_MODE != "random":
+                    # The permutation only ends early when stop_event is set
+                    break
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 gui_print(f"[ERROR] Scanner error: {e}", "error")
-                continue
+                await asyncio.sleep(1)
 
 
 
 if __name__ == "__main__":
-    # Check instance mode first
-    is_master = instance_mgr.check_master()
+    args = parse_args()
+    active_loop = install_event_loop(args.loop)
+    if args.loop == "uvloop" and active_loop != "uvloop":
+        print("[LOOP] uvloop is not installed, falling back to the asyncio event loop")
+    print(f"[LOOP] Using the {active_loop} event loop")
+    install_profile_signal()
+    if args.no_metrics:
+        METRICS_ENABLED = False
+
+    # Decide the role first: only a master launches shard workers
+    if args.worker:
+        instance_mgr.is_master = False
+        is_master = False
+    else:
+        is_master = instance_mgr.check_master()
+
+    if args.shard:
+        shard, shards = (int(x) for x in args.shard.split("/", 1))
+        apply_shard(shard, shards)
+    elif args.processes != 1:
+        if is_master:
+            launch_processes = args.processes if args.processes > 0 else (os.cpu_count() or 1)
+            apply_shard(0, launch_processes)
+        else:
+            print("[WORKER] A master is already running, ignoring --processes")
     
     if not is_master:
         # Worker mode - no GUI, console only
         try:
             print("[WORKER] Starting in worker mode (no GUI)")
-            asyncio.run(main())
+            asyncio.run(worker_main())
         except KeyboardInterrupt:
             print("\n[WORKER] Exiting...")
         finally:
@@ -3015,4 +3853,5 @@ if __name__ == "__main__":
         except KeyboardInterrupt:
             print("\nExiting...")
         finally:
+            stop_shard_workers()
             instance_mgr.stop()